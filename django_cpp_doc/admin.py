@@ -4,7 +4,9 @@ from .models import *
 
 admin.site.register(Package)
 admin.site.register(FileDescriptor)
+admin.site.register(CompileArgument)
 admin.site.register(CompileCommand)
+admin.site.register(SourceUrlRule)
 
 admin.site.register(Decl)
 admin.site.register(NamespaceDecl)
@@ -0,0 +1,266 @@
+import base64
+import binascii
+import functools
+import json
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .cache import package_cache
+from .models import (
+    DECL_KINDS,
+    Decl,
+    FileDescriptor,
+    Package,
+    PackageName,
+    PublicView,
+)
+from .views import (
+    file_get_children,
+    file_get_compile_commands,
+    keyset_page,
+)
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+DECL_KIND_NAMES = {kind: name for name, kind in DECL_KINDS.items()}
+
+class BadRequest(Exception):
+    pass
+
+def api_view(view):
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return JsonResponse(view(request, *args, **kwargs))
+        except BadRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
+    return wrapper
+
+def get_package(slug, version):
+    return get_object_or_404(Package.objects.select_related('package_name'),
+                             package_name__slug=slug, version=version)
+
+def get_list_param(request, name):
+    return {value for value in request.GET.get(name, '').split(',') if value}
+
+def get_parent(request):
+    try:
+        return int(request.GET['parent']) if request.GET['parent'] else None
+    except ValueError:
+        raise BadRequest('Invalid parent.')
+
+def sparse(data, fields):
+    if not fields:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
+
+# Cursors hold the last path of a page as a JSON string, so that the root's
+# empty path still makes a non-empty cursor.
+def encode_cursor(path):
+    return base64.urlsafe_b64encode(
+        json.dumps(path).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        path = json.loads(base64.urlsafe_b64decode(
+            cursor.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, ValueError):
+        raise BadRequest('Invalid cursor.')
+    if not isinstance(path, str):
+        raise BadRequest('Invalid cursor.')
+    return path
+
+def paginate(request, queryset):
+    try:
+        limit = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('Invalid limit.')
+    limit = max(1, min(limit, API_MAX_PAGE_SIZE))
+    after = None
+    if 'cursor' in request.GET:
+        after = decode_cursor(request.GET['cursor'])
+    items, last = keyset_page(queryset, after, limit)
+    return items, encode_cursor(last) if last is not None else None
+
+def package_json(package):
+    return {
+        'name': package.package_name.name,
+        'slug': package.package_name.slug,
+        'version': package.version,
+        'current': package.package_name.current_id == package.pk,
+        'modified': package.modified.isoformat(),
+    }
+
+def file_json(fd):
+    return {
+        'id': fd.pk,
+        'parent': fd.parent_id,
+        'name': fd.name,
+        'path': fd.path,
+        'source_url': fd.source_url or None,
+    }
+
+def decl_related(include, prefix=''):
+    related = list(DECL_KINDS)
+    if 'location' in include:
+        related.append('presumed_loc__file')
+    if 'immutability' in include:
+        related += ['method__immutability_check', 'method__check_result',
+                    'field__immutability_check']
+    return [prefix + name for name in related]
+
+def get_related(obj, name):
+    try:
+        return getattr(obj, name)
+    except ObjectDoesNotExist:
+        return None
+
+def decl_json(decl, include):
+    data = {
+        'id': decl.pk,
+        'parent': decl.parent_id,
+        'name': decl.name,
+        'path': decl.path,
+        'kind': DECL_KIND_NAMES.get(decl.kind),
+    }
+
+    if data['kind'] == 'record':
+        data['is_abstract'] = decl.record.is_abstract
+        data['is_dependent'] = decl.record.is_dependent
+    elif data['kind'] == 'method':
+        data['is_const'] = decl.method.is_const
+        data['is_pure'] = decl.method.is_pure
+        data['access'] = decl.method.get_access_display()
+        data['mangled_name'] = decl.method.mangled_name
+    elif data['kind'] == 'field':
+        data['is_mutable'] = decl.field.is_mutable
+        data['access'] = decl.field.get_access_display()
+
+    if 'location' in include:
+        loc = decl.presumed_loc
+        data['location'] = loc and {
+            'file': loc.file_id,
+            'path': loc.file.path,
+            'line': loc.line,
+            'col': loc.col,
+            'url': loc.get_github_url(),
+        }
+
+    if 'immutability' in include:
+        if data['kind'] == 'method':
+            check = get_related(decl.method, 'immutability_check')
+            result = get_related(decl.method, 'check_result')
+            data['immutability'] = {
+                'mutate_result': check and check.get_mutate_result_display(),
+                'return_result': check and check.get_return_result_display(),
+                'should_be_const': result and result.should_be_const,
+            }
+        elif data['kind'] == 'field':
+            check = get_related(decl.field, 'immutability_check')
+            data['immutability'] = check and {
+                'is_transitive': check.is_transitive,
+                'is_explicit': check.is_explicit,
+            }
+    return data
+
+@api_view
+def package_name_list(request):
+    return {'results': [{'name': package_name.name, 'slug': package_name.slug}
+                        for package_name in PackageName.objects.all()]}
+
+@api_view
+def package_list(request, slug):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    packages = package_name.versions.select_related('package_name')
+    return {'results': [package_json(package) for package in packages]}
+
+@package_cache
+@api_view
+def package_detail(request, slug, version):
+    return package_json(get_package(slug, version))
+
+@package_cache
+@api_view
+def file_list(request, slug, version):
+    package = get_package(slug, version)
+    files = FileDescriptor.objects.filter(package=package)
+    if 'parent' in request.GET:
+        files = files.filter(parent=get_parent(request))
+    fields = get_list_param(request, 'fields')
+    files, cursor = paginate(request, files)
+    return {'results': [sparse(file_json(fd), fields) for fd in files],
+            'next': cursor}
+
+@package_cache
+@api_view
+def file_detail(request, slug, version, fd_pk):
+    package = get_package(slug, version)
+    fd = get_object_or_404(FileDescriptor, pk=fd_pk, package=package)
+    data = file_json(fd)
+    if 'compile_commands' in get_list_param(request, 'include'):
+        data['compile_commands'] = [{
+            'directory': command.directory_id,
+            'output': command.output_id,
+            'command_line': command_line,
+        } for command, command_line in file_get_compile_commands([fd])[fd.pk]]
+    fields = get_list_param(request, 'fields')
+    return sparse(data, fields | {'compile_commands'} if fields else fields)
+
+def file_related_list(request, slug, version, fd_pk, kind):
+    package = get_package(slug, version)
+    fd = get_object_or_404(FileDescriptor, pk=fd_pk, package=package)
+    fields = get_list_param(request, 'fields')
+    files, cursor = paginate(request, file_get_children(fd, kind))
+    return {'results': [sparse(file_json(output), fields) for output in files],
+            'next': cursor}
+
+@package_cache
+@api_view
+def file_outputs(request, slug, version, fd_pk):
+    return file_related_list(request, slug, version, fd_pk, 'output')
+
+@package_cache
+@api_view
+def file_sources(request, slug, version, fd_pk):
+    return file_related_list(request, slug, version, fd_pk, 'source')
+
+@package_cache
+@api_view
+def decl_list(request, slug, version):
+    package = get_package(slug, version)
+    include = get_list_param(request, 'include')
+    decls = Decl.objects.filter(package=package).select_related(
+        *decl_related(include))
+    if 'parent' in request.GET:
+        decls = decls.filter(parent=get_parent(request))
+    kind = request.GET.get('kind')
+    if kind:
+        if kind not in DECL_KINDS:
+            raise BadRequest('Invalid kind.')
+        decls = decls.filter(kind=DECL_KINDS[kind])
+    fields = get_list_param(request, 'fields')
+    decls, cursor = paginate(request, decls)
+    return {'results': [sparse(decl_json(decl, include), fields)
+                        for decl in decls],
+            'next': cursor}
+
+@package_cache
+@api_view
+def decl_detail(request, slug, version, decl_pk):
+    package = get_package(slug, version)
+    include = get_list_param(request, 'include')
+    fields = get_list_param(request, 'fields')
+    decl = get_object_or_404(
+        Decl.objects.select_related(*decl_related(include)),
+        pk=decl_pk, package=package)
+    data = decl_json(decl, include)
+    if 'members' in include and data['kind'] == 'record':
+        views = PublicView.objects.filter(
+            package=package, record=decl.pk,
+            decl__isnull=False).select_related(
+                *decl_related(include, 'decl__')).order_by('decl__path')
+        data['members'] = [sparse(decl_json(view.decl, include), fields)
+                           for view in views]
+    return sparse(data, fields | {'members'} if fields else fields)
@@ -0,0 +1,321 @@
+"""Synthetic packages and timings for the importer, views and jobs.
+
+generate_rows() yields a dump in the importer's format (see importer.py) for
+a package of roughly the requested size: a directory tree of sources and
+headers with compile commands and linkages, and a namespace tree of the
+requested depth holding records with the requested number of members.
+"""
+
+import json
+import math
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from . import urls
+from .counts import update_decl_counts, update_record_counts
+from .export import iter_csv, method_rows
+from .immutability import update_method_results
+from .importer import import_dump
+from .models import Decl, FileDescriptor
+from .public_views import update_public_views
+
+FANOUT = 10
+SHARED_FLAGS = ['-std=c++11', '-O2', '-g', '-fno-exceptions', '-fno-rtti',
+                '-Wall', '-Wextra', '-D_GNU_SOURCE', '-DNDEBUG',
+                '-D__STDC_CONSTANT_MACROS', '-D__STDC_LIMIT_MACROS',
+                '-Iinclude', '-Ibuild/include']
+
+# Most queries each page may run, whatever the package size. Views that are
+# not listed are timed but not checked.
+QUERY_BUDGETS = {
+    'index': 0,
+    'package_name_list': 1,
+    'package_list': 2,
+    'package_current': 1,
+    'package_diff_select': 0,
+    'package_diff': 16,
+    'package_detail': 5,
+    'file_root': 9,
+    'file_detail': 10,
+    'file_children': 5,
+    'file_subtree': 5,
+    'decl_root': 9,
+    'decl_search': 3,
+    'decl_detail': 10,
+    'decl_children': 5,
+    'decl_subtree': 5,
+    'method_export': 3,
+    'api_package_name_list': 1,
+    'api_package_list': 2,
+    'api_package_detail': 2,
+    'api_file_list': 3,
+    'api_file_detail': 3,
+    'api_file_outputs': 4,
+    'api_file_sources': 4,
+    'api_decl_list': 3,
+    'api_decl_detail': 4,
+}
+
+class Ids:
+    def __init__(self):
+        self.last = 0
+
+    def next(self):
+        self.last += 1
+        return self.last
+
+def digits(n, base, width):
+    parts = []
+    for _ in range(width):
+        n, digit = divmod(n, base)
+        parts.append(digit)
+    return reversed(parts)
+
+def generate_rows(slug='synthetic', version='1', files=1000, decls=10000,
+                  depth=4, record_size=50, seed=0):
+    rng = random.Random(seed)
+    yield {'type': 'package', 'name': slug.capitalize(), 'slug': slug,
+           'version': version}
+
+    # Files: FANOUT files per leaf directory, leaf directories spread over a
+    # tree of FANOUT subdirectories per directory.
+    file_ids = Ids()
+    directories = {'': file_ids.next()}
+    yield {'type': 'file', 'id': directories[''], 'parent': None, 'name': '',
+           'path': ''}
+
+    def directory(path):
+        if path not in directories:
+            parent, _, name = path.rpartition('/')
+            parent_id = directory(parent)
+            directories[path] = file_ids.next()
+            rows.append({'type': 'file', 'id': directories[path],
+                         'parent': parent_id, 'name': name, 'path': path})
+        return directories[path]
+
+    rows = []
+    leaves = max(1, files // FANOUT)
+    width = max(1, math.ceil(math.log(leaves, FANOUT))) if leaves > 1 else 1
+    sources = []
+    headers = []
+    for i in range(files):
+        leaf = '/'.join('d{}'.format(d) for d in digits(i // FANOUT, FANOUT,
+                                                         width))
+        parent_id = directory(leaf)
+        yield from rows
+        rows.clear()
+        name = 'f{}.{}'.format(i, 'cpp' if i % 2 == 0 else 'h')
+        file_id = file_ids.next()
+        yield {'type': 'file', 'id': file_id, 'parent': parent_id,
+               'name': name, 'path': '{}/{}'.format(leaf, name)}
+        (sources if i % 2 == 0 else headers).append((file_id, leaf, name))
+
+    # One object per source, one library per top-level directory and one
+    # binary linking every library.
+    build_id = directory('build')
+    directory('build/lib')
+    yield from rows
+    rows.clear()
+    libraries = {}
+    binary_id = file_ids.next()
+    yield {'type': 'file', 'id': binary_id, 'parent': build_id,
+           'name': 'tool', 'path': 'build/tool'}
+    for file_id, leaf, name in sources:
+        top = leaf.split('/')[0]
+        if top not in libraries:
+            libraries[top] = file_ids.next()
+            yield {'type': 'file', 'id': libraries[top],
+                   'parent': directories['build/lib'],
+                   'name': 'lib{}.a'.format(top),
+                   'path': 'build/lib/lib{}.a'.format(top)}
+            yield {'type': 'linkage', 'file': libraries[top],
+                   'output': binary_id}
+        object_id = file_ids.next()
+        object_path = 'build/{}.o'.format(name)
+        yield {'type': 'file', 'id': object_id, 'parent': build_id,
+               'name': name + '.o', 'path': object_path}
+        yield {'type': 'compile_command', 'directory': build_id,
+               'file': file_id, 'output': object_id,
+               'command_line': ['clang++'] + SHARED_FLAGS + [
+                   '-c', '{}/{}'.format(leaf, name), '-o', object_path]}
+        yield {'type': 'linkage', 'file': object_id,
+               'output': libraries[top]}
+
+    # Decls: records of record_size members (three methods per field) in
+    # the leaves of a namespace tree depth levels deep.
+    header_ids = [file_id for file_id, leaf, name in headers] or [1]
+    loc_ids = Ids()
+    decl_ids = Ids()
+    root_id = decl_ids.next()
+    yield {'type': 'decl', 'id': root_id, 'parent': None, 'name': '',
+           'path': '', 'presumed_loc': None, 'kind': 'namespace'}
+    namespaces = {'': root_id}
+
+    def namespace(path):
+        if path not in namespaces:
+            parent, _, name = path.rpartition('::')
+            parent_id = namespace(parent)
+            namespaces[path] = decl_ids.next()
+            rows.append({'type': 'decl', 'id': namespaces[path],
+                         'parent': parent_id, 'name': name, 'path': path,
+                         'presumed_loc': None, 'kind': 'namespace'})
+        return namespaces[path]
+
+    def location():
+        loc_id = loc_ids.next()
+        rows.append({'type': 'presumed_loc', 'id': loc_id,
+                     'file': rng.choice(header_ids),
+                     'line': rng.randint(1, 2000), 'col': 1})
+        return loc_id
+
+    records = max(1, decls // (record_size + 1))
+    leaves = max(1, records // FANOUT)
+    base = max(2, math.ceil(leaves ** (1 / depth)))
+    methods = []
+    for r in range(records):
+        ns = '::'.join('n{}'.format(d) for d in digits(r % leaves, base,
+                                                        depth))
+        ns_id = namespace(ns)
+        record_id = decl_ids.next()
+        record_path = '{}::R{}'.format(ns, r)
+        rows.append({'type': 'decl', 'id': record_id, 'parent': ns_id,
+                     'name': 'R{}'.format(r), 'path': record_path,
+                     'presumed_loc': location(), 'kind': 'record',
+                     'is_abstract': False, 'is_dependent': False})
+        for k in range(record_size):
+            member_id = decl_ids.next()
+            if k % 4 == 3:
+                name = 'f{}'.format(k)
+                rows.append({'type': 'decl', 'id': member_id,
+                             'parent': record_id, 'name': name,
+                             'path': '{}::{}'.format(record_path, name),
+                             'presumed_loc': location(), 'kind': 'field',
+                             'is_mutable': rng.random() < 0.05, 'access': 0})
+                rows.append({'type': 'field_check', 'field': member_id,
+                             'is_transitive': rng.random() < 0.5,
+                             'is_explicit': rng.random() < 0.1})
+            else:
+                name = 'm{}'.format(k)
+                rows.append({'type': 'decl', 'id': member_id,
+                             'parent': record_id, 'name': name,
+                             'path': '{}::{}'.format(record_path, name),
+                             'presumed_loc': location(), 'kind': 'method',
+                             'is_const': rng.random() < 0.3,
+                             'is_pure': False, 'access': 0,
+                             'mangled_name': '_ZN{}R{}{}{}Ev'.format(
+                                 len(str(r)) + 1, r, len(name), name)})
+                rows.append({'type': 'method_check', 'method': member_id,
+                             'mutate_result': rng.choice([1, 2]),
+                             'return_result': rng.randint(1, 4)})
+                for callee_id in rng.sample(methods, min(len(methods), 2)):
+                    rows.append({'type': 'method_dependence',
+                                 'method': member_id, 'callee': callee_id})
+                methods.append(member_id)
+            rows.append({'type': 'public_view', 'record': record_id,
+                         'decl': member_id})
+        yield from rows
+        rows.clear()
+
+def write_dump(path, **options):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in generate_rows(**options):
+            f.write(json.dumps(row))
+            f.write('\n')
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def busiest(queryset):
+    """Returns the parent pk shared by the most rows of queryset."""
+    row = queryset.exclude(parent=None).values('parent').annotate(
+        count=Count('pk')).order_by('-count').first()
+    return row and row['parent']
+
+def view_cases(package):
+    """Yields (url name, url, query) for every cpp_doc URL pattern, except
+    the metrics endpoint when it is disabled.
+
+    URL arguments are filled in from the package: the directory and record
+    with the most children, and the namespace with the most records.
+    """
+    slug, version = package.package_name.slug, package.version
+    fds = FileDescriptor.objects.filter(package=package)
+    decls = Decl.objects.filter(package=package)
+    values = {
+        'slug': slug,
+        'version': version,
+        'old_version': version,
+        'new_version': version,
+        'fd_pk': busiest(fds),
+        'decl_pk': busiest(decls.filter(kind=Decl.METHOD)),
+        'format': 'csv',
+        'path': '',
+    }
+    namespace_pk = busiest(decls.filter(kind=Decl.RECORD))
+    queries = {
+        'package_diff_select': {'old': version, 'new': version},
+        'decl_search': {'q': 'R1'},
+        'decl_children': {'kind': 'record'},
+        'api_decl_list': {'kind': 'method'},
+        'api_decl_detail': {'include': 'members,location,immutability'},
+    }
+    for pattern in urls.urlpatterns:
+        name = pattern.name
+        if name == 'metrics' and not getattr(
+                settings, 'CPP_DOC_METRICS_ENDPOINT', False):
+            continue
+        kwargs = {key: values[key] for key in pattern.pattern.regex.groupindex}
+        if name in ('decl_children', 'decl_subtree'):
+            kwargs['decl_pk'] = namespace_pk
+        yield (name, reverse('cpp_doc:' + name, kwargs=kwargs),
+               queries.get(name, {}))
+
+def run_views(package):
+    """Requests every view once and returns (url name, seconds, queries,
+    status) tuples.
+
+    The package page cache is keyed by URL, so these are cold requests.
+    """
+    client = Client()
+    results = []
+    # The test client's host is only allowed under the test runner.
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, url, query in view_cases(package):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, query)
+                if response.streaming:
+                    for chunk in response.streaming_content:
+                        pass
+                seconds = time.perf_counter() - start
+            results.append((name, seconds, len(queries),
+                            response.status_code))
+    return results
+
+def run_jobs(package):
+    """Times the recompute jobs and a full export."""
+    results = []
+    _, seconds = timed(update_method_results, package)
+    results.append(('method results', seconds))
+    _, seconds = timed(update_public_views, package)
+    results.append(('public views', seconds))
+    _, seconds = timed(update_record_counts, package)
+    results.append(('record counts', seconds))
+    _, seconds = timed(update_decl_counts, package)
+    results.append(('decl counts', seconds))
+    _, seconds = timed(lambda: sum(len(chunk) for chunk in iter_csv(
+        method_rows(package))))
+    results.append(('export csv', seconds))
+    return results
+
+def run_import(path):
+    return timed(import_dump, path)
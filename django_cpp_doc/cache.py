@@ -0,0 +1,63 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Package
+
+DEFAULT_TIMEOUT = 24 * 60 * 60
+
+def get_cache():
+    return caches[getattr(settings, 'CPP_DOC_CACHE', 'default')]
+
+def package_cache(view):
+    """Caches a package page until the package is next modified.
+
+    Imported package versions only change through the importer and the
+    recompute jobs, which all bump Package.modified. The modification time is
+    part of the cache key and the ETag, so bumping it invalidates every page
+    of the package at once.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, slug, version, **kwargs):
+        modified = Package.objects.filter(
+            package_name__slug=slug, version=version).values_list(
+                'modified', flat=True).first()
+        if modified is None or request.method not in ('GET', 'HEAD'):
+            return view(request, slug, version, **kwargs)
+
+        timestamp = modified.timestamp()
+        key = hashlib.md5('{}:{}'.format(
+            timestamp, request.get_full_path()).encode('utf-8')).hexdigest()
+        etag = '"{}"'.format(key)
+        last_modified = int(timestamp)
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+        if response is not None:
+            return response
+
+        cache = get_cache()
+        cache_key = 'cpp_doc:page:{}'.format(key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            response = view(request, slug, version, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code != 200:
+                return response
+            cache.set(cache_key, (response.content, response['Content-Type']),
+                      getattr(settings, 'CPP_DOC_CACHE_TIMEOUT',
+                              DEFAULT_TIMEOUT))
+        else:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return wrapper
@@ -0,0 +1,132 @@
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .models import (
+    Decl,
+    DeclCounts,
+    PublicView,
+    RecordCounts,
+    RecordCountsBase,
+    RecordDecl,
+)
+
+MUTATE_NO = 1
+MUTATE_MAYBE = 2
+RETURN_RESULTS = [
+    ('noop', 1),
+    ('field_t', 2),
+    ('field_nt', 3),
+    ('other', 4),
+]
+
+COUNT_FIELDS = [f.name for f in RecordCountsBase._meta.fields]
+
+# Every record adds its counts to each decl on its tree path.
+UPDATE_DECL_COUNTS_SQL = '''
+INSERT INTO cpp_doc_decl_counts (decl_id, num_records, {columns})
+SELECT ancestor.decl_id, COUNT(*), {sums}
+FROM cpp_doc_record_counts c
+JOIN cpp_doc_decl d ON d.id = c.record_id
+CROSS JOIN LATERAL unnest(
+    string_to_array(rtrim(d.tree_path, '/'), '/')::integer[]
+) AS ancestor(decl_id)
+WHERE d.package_id = %s
+GROUP BY ancestor.decl_id
+'''
+
+def method_counts():
+    check = 'decl__method__immutability_check__'
+    counts = {'num_methods': Count('pk')}
+    for prefix, is_const in [('mutable', False), ('const', True)]:
+        const = Q(decl__method__is_const=is_const)
+        no = const & Q(**{check + 'mutate_result': MUTATE_NO})
+        maybe = const & Q(**{check + 'mutate_result': MUTATE_MAYBE})
+        # Methods that mutate nothing are easy to make const, unless they
+        # return a field transitively, which is odd.
+        easy = no & Q(**{check + 'return_result__in': [1, 3, 4]})
+        odd = no & Q(**{check + 'return_result': 2})
+        counts['num_{}_methods'.format(prefix)] = Count('pk', filter=const)
+        counts['num_{}_no_easy'.format(prefix)] = Count('pk', filter=easy)
+        counts['num_{}_no_odd'.format(prefix)] = Count('pk', filter=odd)
+        counts['num_{}_maybe'.format(prefix)] = Count('pk', filter=maybe)
+        for name, result in RETURN_RESULTS:
+            ret = Q(**{check + 'return_result': result})
+            counts['num_{}_no_ret_{}'.format(prefix, name)] = Count(
+                'pk', filter=no & ret)
+            counts['num_{}_maybe_ret_{}'.format(prefix, name)] = Count(
+                'pk', filter=maybe & ret)
+    # An easy method that returns nothing does nothing at all: a stub.
+    counts['num_mutable_no_easy_non_stub'] = Count(
+        'pk', filter=Q(decl__method__is_const=False,
+                       **{check + 'mutate_result': MUTATE_NO,
+                          check + 'return_result__in': [3, 4]}))
+    return counts
+
+def field_counts():
+    check = 'decl__field__immutability_check__'
+    explicit = Q(**{check + 'is_explicit': True})
+    transitive = Q(**{check + 'is_transitive': True})
+    not_explicit = Q(**{check + 'is_explicit': False})
+    not_transitive = Q(**{check + 'is_transitive': False})
+    unchecked = Q(decl__field__immutability_check__isnull=True)
+    return {
+        'num_fields': Count('pk'),
+        'num_mutable_fields': Count(
+            'pk', filter=Q(decl__field__is_mutable=True)),
+        'num_explicit_fields': Count('pk', filter=explicit),
+        'num_transitive_fields': Count('pk', filter=transitive),
+        'num_only_explicit_fields': Count(
+            'pk', filter=explicit & not_transitive),
+        'num_only_transitive_fields': Count(
+            'pk', filter=transitive & not_explicit),
+        'num_neither_explicit_transitive_fields': Count(
+            'pk', filter=(not_explicit & not_transitive) | unchecked),
+        'num_both_explicit_transitive_fields': Count(
+            'pk', filter=explicit & transitive),
+    }
+
+def aggregate(views, counts):
+    return {row.pop('record'): row
+            for row in views.values('record').annotate(**counts)}
+
+def update_record_counts(package, record_ids=None):
+    records = RecordDecl.objects.filter(decl__package=package)
+    views = PublicView.objects.filter(package=package)
+    if record_ids is not None:
+        records = records.filter(pk__in=record_ids)
+        views = views.filter(record__in=record_ids)
+
+    methods = aggregate(views.filter(decl__kind=Decl.METHOD),
+                        method_counts())
+    fields = aggregate(views.filter(decl__kind=Decl.FIELD),
+                       field_counts())
+    zero = {name: 0 for name in COUNT_FIELDS}
+    counts = []
+    for pk in records.values_list('pk', flat=True).iterator():
+        row = dict(zero)
+        row.update(methods.get(pk, {}))
+        row.update(fields.get(pk, {}))
+        counts.append(RecordCounts(record_id=pk, **row))
+
+    with transaction.atomic():
+        RecordCounts.objects.filter(record__in=records).delete()
+        RecordCounts.objects.bulk_create(counts, batch_size=5000)
+        package.touch(files=False)
+    return len(counts)
+
+def changed_record_ids(decl_ids):
+    """Records whose public view includes any of the given decls."""
+    return set(PublicView.objects.filter(decl__in=decl_ids).values_list(
+        'record', flat=True))
+
+def update_decl_counts(package):
+    sql = UPDATE_DECL_COUNTS_SQL.format(
+        columns=', '.join(COUNT_FIELDS),
+        sums=', '.join('SUM(c.{})'.format(name) for name in COUNT_FIELDS))
+    with transaction.atomic():
+        DeclCounts.objects.filter(decl__package=package).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [package.pk])
+            count = cursor.rowcount
+        package.touch(files=False)
+    return count
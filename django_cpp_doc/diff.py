@@ -0,0 +1,76 @@
+from django.db import connection, transaction
+
+from .models import PackageDiff
+
+METHOD, FIELD = 0, 1
+ADDED, REMOVED, CHANGED = 0, 1, 2
+
+METHODS_SQL = '''
+SELECT d.id, d.path, m.mangled_name, m.is_const, c.mutate_result,
+       c.return_result, r.should_be_const
+FROM cpp_doc_decl d
+JOIN cpp_doc_method_decl m ON m.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_method c ON c.method_id = d.id
+LEFT JOIN cpp_doc_immutability_check_method_result r ON r.method_id = d.id
+WHERE d.package_id = %s
+'''
+METHOD_COLUMNS = ['mangled_name', 'is_const', 'mutate_result',
+                  'return_result', 'should_be_const']
+
+FIELDS_SQL = '''
+SELECT d.id, d.path, f.is_mutable, c.is_transitive, c.is_explicit
+FROM cpp_doc_decl d
+JOIN cpp_doc_field_decl f ON f.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_field c ON c.field_id = d.id
+WHERE d.package_id = %s
+'''
+FIELD_COLUMNS = ['is_mutable', 'is_transitive', 'is_explicit']
+
+# Members are matched by path in one full outer join; unmatched rows on
+# either side are additions or removals, matched rows are changes if any
+# compared column differs.
+DIFF_SQL = '''
+INSERT INTO cpp_doc_package_diff_entry
+    (diff_id, kind, change, path, old_decl_id, new_decl_id)
+SELECT %s, %s,
+       CASE WHEN a.id IS NULL THEN {added}
+            WHEN b.id IS NULL THEN {removed}
+            ELSE {changed} END,
+       COALESCE(b.path, a.path), a.id, b.id
+FROM ({members}) a
+FULL OUTER JOIN ({members}) b ON a.path = b.path
+WHERE a.id IS NULL OR b.id IS NULL
+   OR ({old_columns}) IS DISTINCT FROM ({new_columns})
+'''
+
+def diff_sql(members, columns):
+    return DIFF_SQL.format(
+        added=ADDED, removed=REMOVED, changed=CHANGED, members=members,
+        old_columns=', '.join('a.' + column for column in columns),
+        new_columns=', '.join('b.' + column for column in columns))
+
+def compute_diff(diff):
+    diff.entries.all().delete()
+    with connection.cursor() as cursor:
+        for kind, members, columns in [(METHOD, METHODS_SQL, METHOD_COLUMNS),
+                                       (FIELD, FIELDS_SQL, FIELD_COLUMNS)]:
+            cursor.execute(diff_sql(members, columns),
+                           [diff.pk, kind, diff.old_id, diff.new_id])
+    diff.old_modified = diff.old.modified
+    diff.new_modified = diff.new.modified
+    diff.save()
+
+def get_package_diff(old, new):
+    """Returns the diff between two package versions, computing it if needed.
+
+    Diffs are stored per version pair and recomputed only when either
+    package has been modified since.
+    """
+    with transaction.atomic():
+        diff, created = PackageDiff.objects.select_for_update().get_or_create(
+            old=old, new=new, defaults={'old_modified': old.modified,
+                                        'new_modified': new.modified})
+        diff.old, diff.new = old, new
+        if created or not diff.is_current():
+            compute_diff(diff)
+    return diff
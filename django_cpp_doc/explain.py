@@ -0,0 +1,49 @@
+from django.db.models import Count
+
+from .models import DECL_KINDS, Decl, FileDescriptor, PublicView
+from .views import CHILDREN_PAGE_SIZE
+
+def largest(queryset, field):
+    """Returns the value of field shared by the most rows of queryset."""
+    row = queryset.values(field).annotate(count=Count('pk')).order_by(
+        '-count').first()
+    return row and row[field]
+
+def page(queryset):
+    # The first page of a child listing, as fetched by keyset_page().
+    return queryset.order_by('path')[:CHILDREN_PAGE_SIZE + 1]
+
+def sample_queries(package):
+    """Returns (name, queryset) pairs for the lookups behind the pages.
+
+    Child listings use the node with the most children, which is where a
+    missing index shows most.
+    """
+    queries = [
+        ('file root', FileDescriptor.objects.filter(package=package,
+                                                    parent=None)),
+        ('decl root', Decl.objects.filter(package=package, parent=None)),
+    ]
+
+    fd_pk = largest(FileDescriptor.objects.filter(package=package).exclude(
+        parent=None), 'parent')
+    if fd_pk is not None:
+        queries.append(('file children', page(
+            FileDescriptor.objects.filter(parent=fd_pk))))
+
+    decls = Decl.objects.filter(package=package).exclude(parent=None)
+    for kind in ['namespace', 'record', 'method', 'field']:
+        decl_pk = largest(decls.filter(kind=DECL_KINDS[kind]), 'parent')
+        if decl_pk is not None:
+            children = getattr(Decl(pk=decl_pk), kind + 's')()
+            queries.append(('decl {}s'.format(kind), page(children)))
+
+    record_pk = largest(PublicView.objects.filter(package=package),
+                        'record')
+    if record_pk is not None:
+        for kind in ['method', 'field']:
+            views = PublicView.objects.filter(
+                package=package, record=record_pk, kind=DECL_KINDS[kind])
+            queries.append(('public {}s'.format(kind),
+                            views.order_by('path')))
+    return queries
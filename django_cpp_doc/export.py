@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+
+from .models import MethodDecl
+
+CHUNK_SIZE = 2000
+
+METHOD_COLUMNS = [
+    ('id', 'decl_id'),
+    ('path', 'decl__path'),
+    ('name', 'decl__name'),
+    ('mangled_name', 'mangled_name'),
+    ('is_const', 'is_const'),
+    ('is_pure', 'is_pure'),
+    ('access', 'access'),
+    ('mutate_result', 'immutability_check__mutate_result'),
+    ('return_result', 'immutability_check__return_result'),
+    ('should_be_const', 'check_result__should_be_const'),
+    ('file', 'decl__presumed_loc__file__path'),
+    ('line', 'decl__presumed_loc__line'),
+    ('col', 'decl__presumed_loc__col'),
+]
+
+EXPORT_FORMATS = ['csv', 'jsonl', 'parquet']
+
+def method_rows(package):
+    # iterator() uses a server-side cursor on PostgreSQL, so only one chunk
+    # of rows is held in memory at a time.
+    methods = MethodDecl.objects.filter(decl__package=package).order_by(
+        'pk').values_list(*[lookup for name, lookup in METHOD_COLUMNS])
+    return methods.iterator(chunk_size=CHUNK_SIZE)
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, lookup in METHOD_COLUMNS])
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_jsonl(rows):
+    names = [name for name, lookup in METHOD_COLUMNS]
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(names, row))))
+        if len(chunk) == CHUNK_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+def write_parquet(rows, sink):
+    # sink is a path or a binary file object. pyarrow is only needed for
+    # Parquet exports.
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = pyarrow.schema([
+        ('id', pyarrow.int64()),
+        ('path', pyarrow.string()),
+        ('name', pyarrow.string()),
+        ('mangled_name', pyarrow.string()),
+        ('is_const', pyarrow.bool_()),
+        ('is_pure', pyarrow.bool_()),
+        ('access', pyarrow.int32()),
+        ('mutate_result', pyarrow.int32()),
+        ('return_result', pyarrow.int32()),
+        ('should_be_const', pyarrow.bool_()),
+        ('file', pyarrow.string()),
+        ('line', pyarrow.int32()),
+        ('col', pyarrow.int32()),
+    ])
+
+    def write_chunk(writer, chunk):
+        columns = list(zip(*chunk))
+        writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type)
+             for column, field in zip(columns, schema)],
+            schema=schema))
+
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == CHUNK_SIZE:
+                write_chunk(writer, chunk)
+                chunk = []
+        if chunk:
+            write_chunk(writer, chunk)
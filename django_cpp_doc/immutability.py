@@ -0,0 +1,116 @@
+from array import array
+from bisect import bisect_left
+
+from django.db import transaction
+
+from .models import (
+    ClangImmutabilityCheckMethodResult,
+    ClangImmutabilityMethodDependence,
+    MethodDecl,
+)
+
+MUTATE_NO = 1
+RETURN_FIELD_TRANSITIVE = 2
+BATCH_SIZE = 5000
+
+class MethodGraph:
+    """Call graph of a package's methods held in flat arrays.
+
+    Methods are numbered by their position in the sorted ``pks`` array, and
+    the callers of method ``i`` are ``callers[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, methods, edges):
+        """Builds the graph from (pk, is_const, mutate_result, return_result)
+        rows ordered by pk and (caller pk, callee pk) rows.
+        """
+        self.pks = array('q')
+        self.is_const = bytearray()
+        self.mutates = bytearray()
+        self.returns_field = bytearray()
+        for pk, is_const, mutate_result, return_result in methods:
+            self.pks.append(pk)
+            self.is_const.append(is_const)
+            # Const methods cannot mutate this. Anything else mutates unless
+            # the check proved otherwise.
+            self.mutates.append(not is_const and mutate_result != MUTATE_NO)
+            self.returns_field.append(return_result == RETURN_FIELD_TRANSITIVE)
+
+        callee_ids = array('i')
+        caller_ids = array('i')
+        for method_pk, callee_pk in edges:
+            caller = self.index(method_pk)
+            callee = self.index(callee_pk)
+            if callee is None:
+                # Calls out of the package are not analysed.
+                if not self.is_const[caller]:
+                    self.mutates[caller] = True
+            else:
+                caller_ids.append(caller)
+                callee_ids.append(callee)
+
+        # Bucket the edges by callee (counting sort).
+        n = len(self.pks)
+        self.offsets = array('i', bytes(4 * (n + 1)))
+        for callee in callee_ids:
+            self.offsets[callee + 1] += 1
+        for i in range(n):
+            self.offsets[i + 1] += self.offsets[i]
+        position = array('i', self.offsets[:n])
+        self.callers = array('i', bytes(4 * len(caller_ids)))
+        for caller, callee in zip(caller_ids, callee_ids):
+            self.callers[position[callee]] = caller
+            position[callee] += 1
+
+    def index(self, pk):
+        i = bisect_left(self.pks, pk)
+        if i < len(self.pks) and self.pks[i] == pk:
+            return i
+        return None
+
+    def propagate(self):
+        # A method mutates if it can reach a mutating method through calls,
+        # so a single reverse traversal from the mutating methods reaches the
+        # fixpoint; cycles need no special handling.
+        stack = [i for i, mutates in enumerate(self.mutates) if mutates]
+        while stack:
+            callee = stack.pop()
+            for j in range(self.offsets[callee], self.offsets[callee + 1]):
+                caller = self.callers[j]
+                if not self.mutates[caller] and not self.is_const[caller]:
+                    self.mutates[caller] = True
+                    stack.append(caller)
+
+    def should_be_const(self, i):
+        return not (self.mutates[i] or self.returns_field[i])
+
+def load_method_graph(package):
+    methods = MethodDecl.objects.filter(decl__package=package).order_by(
+        'pk').values_list('pk', 'is_const',
+                          'immutability_check__mutate_result',
+                          'immutability_check__return_result')
+    edges = ClangImmutabilityMethodDependence.objects.filter(
+        method__decl__package=package).values_list('method', 'callee')
+    return MethodGraph(methods.iterator(), edges.iterator())
+
+def update_method_results(package):
+    graph = load_method_graph(package)
+    graph.propagate()
+    results = (ClangImmutabilityCheckMethodResult(
+                   method_id=pk, should_be_const=graph.should_be_const(i))
+               for i, pk in enumerate(graph.pks) if not graph.is_const[i])
+    count = 0
+    with transaction.atomic():
+        ClangImmutabilityCheckMethodResult.objects.filter(
+            method__decl__package=package).delete()
+        batch = []
+        for result in results:
+            batch.append(result)
+            if len(batch) == BATCH_SIZE:
+                ClangImmutabilityCheckMethodResult.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        ClangImmutabilityCheckMethodResult.objects.bulk_create(batch)
+        count += len(batch)
+        package.touch(files=False)
+    return count
@@ -0,0 +1,468 @@
+"""Bulk loader for clang-exported package dumps.
+
+A dump is a JSON-lines file (optionally gzip compressed) with one object per
+line.  The first line describes the package, every following line is a row
+tagged with its ``type``.  Rows refer to each other with ids that are local to
+the dump; they are mapped to database primary keys in memory, so a row only
+has to appear after the rows it refers to.
+
+    {"type": "package", "name": "LLVM", "slug": "llvm", "version": "5.0.0"}
+    {"type": "file", "id": 1, "parent": null, "name": "", "path": ""}
+    {"type": "presumed_loc", "id": 1, "file": 2, "line": 10, "col": 1}
+    {"type": "decl", "id": 1, "parent": null, "name": "", "path": "",
+     "presumed_loc": null, "kind": "namespace"}
+    {"type": "method_check", "method": 7, "mutate_result": 1,
+     "return_result": 1}
+"""
+
+import gzip
+import json
+import logging
+import multiprocessing
+import sys
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Q
+
+from .models import (
+    DECL_KINDS,
+    ClangImmutabilityCheckField,
+    ClangImmutabilityCheckMethod,
+    ClangImmutabilityCheckMethodResult,
+    ClangImmutabilityMethodDependence,
+    CompileArgument,
+    CompileCommand,
+    Decl,
+    FieldDecl,
+    FileDescriptor,
+    FunctionDecl,
+    Linkage,
+    MethodDecl,
+    NamespaceDecl,
+    Package,
+    PackageName,
+    PresumedLoc,
+    PublicView,
+    RecordDecl,
+)
+from .counts import update_decl_counts, update_record_counts
+from .lifecycle import delete_package
+from .linkage import update_file_outputs
+from .partitions import create_partitions, drop_partitions_of
+from .public_views import update_public_views
+from .source_urls import resolve_source_urls
+
+BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+class DumpError(Exception):
+    pass
+
+def open_dump(path):
+    if path == '-':
+        # A second file object on standard input, so that closing the dump
+        # leaves sys.stdin open.
+        return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+    elif path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    else:
+        return open(path, encoding='utf-8')
+
+class IdPool:
+    """Primary keys reserved in bulk from a table's sequence."""
+
+    def __init__(self, model, batch_size):
+        self.table = model._meta.db_table
+        self.column = model._meta.pk.column
+        self.batch_size = batch_size
+        self.ids = []
+
+    def next(self):
+        if not self.ids:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+                    'FROM generate_series(1, %s)',
+                    [self.table, self.column, self.batch_size])
+                self.ids = [row[0] for row in cursor.fetchall()]
+                self.ids.reverse()
+        return self.ids.pop()
+
+class Importer:
+    def __init__(self, package_id, batch_size=BATCH_SIZE, replace=False):
+        self.package_id = package_id
+        self.batch_size = batch_size
+        self.replace = replace
+        self.package = None
+        # Ids of the versions this import replaced, whose partitions are left
+        # for the caller to drop.
+        self.replaced_ids = []
+        self.file_ids = {}
+        self.presumed_loc_ids = {}
+        self.decl_ids = {}
+        self.file_tree_paths = {}
+        self.decl_tree_paths = {}
+        self.argument_ids = {}
+        self.file_pool = IdPool(FileDescriptor, batch_size)
+        self.presumed_loc_pool = IdPool(PresumedLoc, batch_size)
+        self.decl_pool = IdPool(Decl, batch_size)
+        self.argument_pool = IdPool(CompileArgument, batch_size)
+        self.pending = {}
+        self.handlers = {
+            'file': self.add_file,
+            'presumed_loc': self.add_presumed_loc,
+            'decl': self.add_decl,
+            'compile_command': self.add_compile_command,
+            'linkage': self.add_linkage,
+            'method_dependence': self.add_method_dependence,
+            'method_check': self.add_method_check,
+            'method_result': self.add_method_result,
+            'field_check': self.add_field_check,
+            'public_view': self.add_public_view,
+        }
+
+    def add(self, obj):
+        model = type(obj)
+        objs = self.pending.setdefault(model, [])
+        objs.append(obj)
+        if len(objs) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        objs = self.pending.pop(model, [])
+        if objs:
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def flush_all(self):
+        for model in list(self.pending):
+            self.flush(model)
+
+    def resolve(self, ids, row, key, kind, null=False):
+        dump_id = row.get(key)
+        if dump_id is None:
+            if null:
+                return None
+            raise DumpError('missing {} "{}"'.format(kind, key))
+        try:
+            return ids[dump_id]
+        except KeyError:
+            raise DumpError('unknown {} id {}'.format(kind, dump_id))
+
+    def file(self, row, key, null=False):
+        return self.resolve(self.file_ids, row, key, 'file', null)
+
+    def decl(self, row, key, null=False):
+        return self.resolve(self.decl_ids, row, key, 'decl', null)
+
+    def set_package(self, row):
+        if self.package is not None:
+            raise DumpError('more than one package')
+        package_name, created = PackageName.objects.get_or_create(
+            slug=row['slug'], defaults={'name': row.get('name', row['slug'])})
+        if not self.replace and Package.objects.filter(
+                package_name=package_name, version=row['version']).exists():
+            raise DumpError('{} {} already exists'.format(package_name,
+                                                          row['version']))
+        self.package = Package.objects.create(pk=self.package_id,
+                                              package_name=package_name,
+                                              version=row['version'])
+
+    def add_file(self, row):
+        pk = self.file_pool.next()
+        parent_id = self.file(row, 'parent', null=True)
+        parent_tree_path = self.file_tree_paths.get(parent_id, '')
+        tree_path = FileDescriptor.make_tree_path(pk, parent_tree_path)
+        self.add(FileDescriptor(pk=pk,
+                                package=self.package,
+                                parent_id=parent_id,
+                                name=row.get('name', ''),
+                                path=row.get('path', ''),
+                                tree_path=tree_path,
+                                depth=parent_tree_path.count('/')))
+        self.file_ids[row['id']] = pk
+        self.file_tree_paths[pk] = tree_path
+
+    def add_presumed_loc(self, row):
+        pk = self.presumed_loc_pool.next()
+        self.add(PresumedLoc(pk=pk,
+                             package=self.package,
+                             file_id=self.file(row, 'file'),
+                             line=row['line'],
+                             col=row['col']))
+        self.presumed_loc_ids[row['id']] = pk
+
+    def add_decl(self, row):
+        pk = self.decl_pool.next()
+        parent_id = self.decl(row, 'parent', null=True)
+        parent_tree_path = self.decl_tree_paths.get(parent_id, '')
+        tree_path = Decl.make_tree_path(pk, parent_tree_path)
+        kind = row.get('kind')
+        if kind is not None and kind not in DECL_KINDS:
+            raise DumpError('unknown decl kind "{}"'.format(kind))
+        self.add(Decl(pk=pk,
+                      package=self.package,
+                      parent_id=parent_id,
+                      name=row.get('name', ''),
+                      path=row.get('path', ''),
+                      presumed_loc_id=self.resolve(self.presumed_loc_ids, row,
+                                                   'presumed_loc',
+                                                   'presumed_loc', null=True),
+                      tree_path=tree_path,
+                      depth=parent_tree_path.count('/'),
+                      kind=DECL_KINDS.get(kind, Decl.OTHER)))
+        self.decl_ids[row['id']] = pk
+        self.decl_tree_paths[pk] = tree_path
+
+        if kind == 'namespace':
+            self.add(NamespaceDecl(decl_id=pk))
+        elif kind == 'record':
+            self.add(RecordDecl(decl_id=pk,
+                                is_abstract=row['is_abstract'],
+                                is_dependent=row['is_dependent']))
+        elif kind == 'method':
+            self.add(MethodDecl(decl_id=pk,
+                                is_const=row['is_const'],
+                                is_pure=row['is_pure'],
+                                access=row['access'],
+                                mangled_name=row.get('mangled_name', '')))
+        elif kind == 'field':
+            self.add(FieldDecl(decl_id=pk,
+                               is_mutable=row['is_mutable'],
+                               access=row['access']))
+        elif kind == 'function':
+            self.add(FunctionDecl(decl_id=pk))
+
+    def intern_arguments(self, command_line):
+        arguments = []
+        for value in command_line:
+            pk = self.argument_ids.get(value)
+            if pk is None:
+                pk = self.argument_pool.next()
+                self.add(CompileArgument(pk=pk, package=self.package,
+                                         value=value))
+                self.argument_ids[value] = pk
+            arguments.append(pk)
+        return arguments
+
+    def add_compile_command(self, row):
+        self.add(CompileCommand(package=self.package,
+                                directory_id=self.file(row, 'directory'),
+                                file_id=self.file(row, 'file'),
+                                output_id=self.file(row, 'output', null=True),
+                                arguments=self.intern_arguments(
+                                    row.get('command_line', []))))
+
+    def add_linkage(self, row):
+        self.add(Linkage(package=self.package,
+                         file_id=self.file(row, 'file'),
+                         output_id=self.file(row, 'output')))
+
+    def add_method_dependence(self, row):
+        self.add(ClangImmutabilityMethodDependence(
+            method_id=self.decl(row, 'method'),
+            callee_id=self.decl(row, 'callee')))
+
+    def add_method_check(self, row):
+        self.add(ClangImmutabilityCheckMethod(
+            method_id=self.decl(row, 'method'),
+            mutate_result=row['mutate_result'],
+            return_result=row['return_result']))
+
+    def add_method_result(self, row):
+        self.add(ClangImmutabilityCheckMethodResult(
+            method_id=self.decl(row, 'method'),
+            should_be_const=row['should_be_const']))
+
+    def add_field_check(self, row):
+        self.add(ClangImmutabilityCheckField(
+            field_id=self.decl(row, 'field'),
+            is_transitive=row['is_transitive'],
+            is_explicit=row['is_explicit']))
+
+    def add_public_view(self, row):
+        self.add(PublicView(package=self.package,
+                            record_id=self.decl(row, 'record'),
+                            decl_id=self.decl(row, 'decl', null=True)))
+
+    def add_row(self, row):
+        row_type = row.get('type')
+        if row_type == 'package':
+            self.set_package(row)
+            return
+        elif self.package is None:
+            raise DumpError('dump must start with a package')
+        try:
+            handler = self.handlers[row_type]
+        except KeyError:
+            raise DumpError('unknown row type "{}"'.format(row_type))
+        handler(row)
+
+    def run(self, f):
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self.add_row(json.loads(line))
+            except (DumpError, KeyError, ValueError) as e:
+                if isinstance(e, KeyError):
+                    e = 'missing field {}'.format(e)
+                raise DumpError('line {}: {}'.format(line_number, e))
+        if self.package is None:
+            raise DumpError('empty dump')
+        self.flush_all()
+        resolve_source_urls(self.package)
+        update_file_outputs(self.package)
+        update_public_views(self.package)
+        update_record_counts(self.package)
+        update_decl_counts(self.package)
+        self.replace_old_versions()
+        return self.package
+
+    def replace_old_versions(self):
+        # Runs in the import's transaction, so readers keep seeing the old
+        # version until the new one is committed in its place.
+        old = list(Package.objects.filter(
+            package_name=self.package.package_name,
+            version=self.package.version).exclude(pk=self.package.pk))
+        # The first version of a package becomes its current version, and
+        # a replaced version hands the pointer over.
+        PackageName.objects.filter(
+            Q(current=None) | Q(current__in=old),
+            pk=self.package.package_name_id).update(current=self.package)
+        for package in old:
+            delete_package(package, partitions=False)
+            self.replaced_ids.append(package.pk)
+
+def load_dump(path, package_id, batch_size=BATCH_SIZE, replace=False):
+    """Imports a dump into the already created partitions of package_id.
+
+    Returns the package and the ids of the versions it replaced, whose
+    partitions are left for the caller to drop.
+    """
+    with open_dump(path) as f, transaction.atomic():
+        importer = Importer(package_id, batch_size, replace)
+        return importer.run(f), importer.replaced_ids
+
+def import_dump(path, batch_size=BATCH_SIZE, replace=False):
+    """Imports a single dump. Like all partition DDL, this must not run
+    while other imports do (see partitions.py).
+    """
+    package_id = IdPool(Package, 1).next()
+    create_partitions(package_id)
+    try:
+        package, replaced_ids = load_dump(path, package_id, batch_size,
+                                          replace)
+    except BaseException:
+        drop_unused_partitions([package_id])
+        raise
+    drop_unused_partitions(replaced_ids)
+    return package
+
+def drop_unused_partitions(package_ids):
+    """Drops the partitions of those of package_ids that have no package
+    row: imports that failed or never committed, and replaced versions.
+
+    An aborted pool can kill a worker after its import committed but before
+    it reported back, so the package rows decide which partitions are still
+    in use. Failures are logged rather than raised, as this runs on the way
+    out of failed imports; cpp_doc_drop_partitions drops what is left.
+    """
+    used = set(Package.objects.filter(pk__in=package_ids).values_list(
+        'pk', flat=True))
+    failures = drop_partitions_of(
+        [package_id for package_id in package_ids if package_id not in used])
+    for package_id, error in failures:
+        logger.warning('Could not drop the partitions of package %s: %s',
+                       package_id, error)
+
+def read_package_row(path):
+    with open_dump(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if row.get('type') != 'package':
+                    raise DumpError('dump must start with a package')
+                return row
+    raise DumpError('empty dump')
+
+def import_one(args):
+    path, package_id, batch_size, replace = args
+    try:
+        package, replaced_ids = load_dump(path, package_id, batch_size,
+                                          replace)
+    except (DumpError, DatabaseError, OSError, ValueError) as e:
+        return path, None, str(e), []
+    return path, str(package), None, replaced_ids
+
+def import_all(jobs, workers):
+    if workers > 1:
+        # Forked workers must not share the parent's connection.
+        connections.close_all()
+        with multiprocessing.Pool(workers) as pool:
+            yield from pool.imap_unordered(import_one, jobs)
+    else:
+        for job in jobs:
+            yield import_one(job)
+
+def import_dumps(paths, batch_size=BATCH_SIZE, replace=False, workers=1):
+    """Imports several dumps, each in its own transaction.
+
+    Yields (path, package, error) as each import finishes, where package is
+    the imported package's name and error is None on success.
+    """
+    if '-' in paths and len(paths) > 1:
+        raise ValueError('standard input must be the only dump')
+
+    # Package names are created up front, so parallel imports of versions of
+    # the same package do not race to create them, and parallel imports of
+    # the same version are refused. Standard input can only be read once,
+    # and is imported alone.
+    pending = []
+    seen = {}
+    for path in paths:
+        if path == '-':
+            pending.append(path)
+            continue
+        try:
+            row = read_package_row(path)
+            key = (row['slug'], row['version'])
+            if key in seen:
+                raise DumpError('{} {} is also imported from {}'.format(
+                    row['slug'], row['version'], seen[key]))
+            PackageName.objects.get_or_create(
+                slug=row['slug'],
+                defaults={'name': row.get('name', row['slug'])})
+        except (DumpError, OSError, KeyError, ValueError) as e:
+            yield path, None, str(e)
+        else:
+            seen[key] = path
+            pending.append(path)
+
+    # Partition DDL waits for every running import to commit, and blocks
+    # readers while it waits (see partitions.py). So every partition the
+    # imports need is created before the first one starts, and partitions of
+    # replaced versions and failed imports are only dropped after the last
+    # one has finished, or the imports were aborted.
+    jobs = []
+    created_ids = []
+    for path in pending:
+        package_id = IdPool(Package, 1).next()
+        try:
+            create_partitions(package_id)
+        except DatabaseError as e:
+            yield path, None, str(e)
+        else:
+            created_ids.append(package_id)
+            jobs.append((path, package_id, batch_size, replace))
+
+    replaced_ids = []
+    results = import_all(jobs, workers)
+    try:
+        for path, package, error, package_ids in results:
+            replaced_ids.extend(package_ids)
+            yield path, package, error
+    finally:
+        results.close()
+        drop_unused_partitions(created_ids + replaced_ids)
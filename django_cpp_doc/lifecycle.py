@@ -0,0 +1,81 @@
+from django.db import connection, transaction
+
+from .models import PackageName
+from .partitions import drop_partitions
+
+DECLS = 'SELECT id FROM cpp_doc_decl WHERE package_id = %(package)s'
+DIFFS = '''SELECT id FROM cpp_doc_package_diff
+WHERE old_id = %(package)s OR new_id = %(package)s'''
+
+# One DELETE per table, referencing tables first. Deleting a Package through
+# the ORM instead collects and deletes every row of the cascade in Python.
+# Partitioned tables are dropped with the package's partitions instead.
+DELETE_PACKAGE_SQL = [
+    'DELETE FROM cpp_doc_package_diff_entry WHERE diff_id IN ({})'.format(
+        DIFFS),
+    'DELETE FROM cpp_doc_package_diff '
+    'WHERE old_id = %(package)s OR new_id = %(package)s',
+    'DELETE FROM cpp_doc_immutability_method_dependence '
+    'WHERE method_id IN ({})'.format(DECLS),
+    'DELETE FROM cpp_doc_immutability_check_method_result '
+    'WHERE method_id IN ({})'.format(DECLS),
+    'DELETE FROM cpp_doc_clang_immutability_check_method '
+    'WHERE method_id IN ({})'.format(DECLS),
+    'DELETE FROM cpp_doc_clang_immutability_check_field '
+    'WHERE field_id IN ({})'.format(DECLS),
+    'DELETE FROM cpp_doc_record_counts WHERE record_id IN ({})'.format(DECLS),
+    'DELETE FROM cpp_doc_decl_counts WHERE decl_id IN ({})'.format(DECLS),
+] + [
+    'DELETE FROM {} WHERE decl_id IN ({})'.format(table, DECLS)
+    for table in ['cpp_doc_namespace_decl', 'cpp_doc_record_decl',
+                  'cpp_doc_method_decl', 'cpp_doc_field_decl',
+                  'cpp_doc_function_decl']
+] + [
+    'DELETE FROM {} WHERE package_id = %(package)s'.format(table)
+    for table in ['cpp_doc_file_output', 'cpp_doc_linkage',
+                  'cpp_doc_compile_command', 'cpp_doc_compile_argument']
+]
+
+def set_current(package):
+    # Pages of both the old and the new current version show which one is
+    # current, so both are touched to invalidate them.
+    with transaction.atomic():
+        package_name = PackageName.objects.select_for_update().get(
+            pk=package.package_name_id)
+        if package_name.current_id == package.pk:
+            return
+        if package_name.current is not None:
+            package_name.current.touch(files=False, decls=False)
+        package_name.current = package
+        package_name.save(update_fields=['current'])
+        package.touch(files=False, decls=False)
+
+def delete_package(package, partitions=True):
+    """Deletes a package version.
+
+    With partitions=False its partitions are left in place, unreachable once
+    the package row is gone, for the caller to drop with drop_partitions()
+    when no import is running (see partitions.py).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        PackageName.objects.filter(current=package).update(current=None)
+        for sql in DELETE_PACKAGE_SQL:
+            cursor.execute(sql, {'package': package.pk})
+        # Last, to hold the lock on the partitioned tables for the shortest
+        # time.
+        if partitions:
+            drop_partitions(package.pk)
+        cursor.execute('DELETE FROM cpp_doc_package WHERE id = %s',
+                       [package.pk])
+
+def retire_package(package, current=None):
+    """Deletes a package version, making current the current version of the
+    package in its place.
+
+    Both happen in one transaction, so readers see either the old version
+    and pointer or the new pointer, never a partly deleted tree.
+    """
+    with transaction.atomic():
+        if current is not None:
+            set_current(current)
+        delete_package(package)
@@ -0,0 +1,40 @@
+from django.db import connection, transaction
+
+from .models import FileOutput
+
+# Follows compile commands and linkages from every input to every output it
+# ends up in. UNION discards repeated rows, so cycles terminate. A pair is
+# direct if any path to it is a single edge; the flag is carried through the
+# recursion so no pair has to be looked up in edge again.
+UPDATE_FILE_OUTPUTS_SQL = '''
+INSERT INTO cpp_doc_file_output
+    (package_id, file_id, output_id, is_direct, is_source)
+WITH RECURSIVE edge(file_id, output_id) AS (
+    SELECT file_id, output_id FROM cpp_doc_compile_command
+    WHERE package_id = %(package)s AND output_id IS NOT NULL
+    UNION
+    SELECT file_id, output_id FROM cpp_doc_linkage
+    WHERE package_id = %(package)s
+), reach(file_id, output_id, direct) AS (
+    SELECT file_id, output_id, true FROM edge
+    UNION
+    SELECT r.file_id, e.output_id, false
+    FROM reach r
+    JOIN edge e ON e.file_id = r.output_id
+)
+SELECT %(package)s, r.file_id, r.output_id, bool_or(r.direct),
+       EXISTS (SELECT 1 FROM cpp_doc_compile_command c
+               WHERE c.file_id = r.file_id)
+FROM reach r
+WHERE r.file_id <> r.output_id
+GROUP BY r.file_id, r.output_id
+'''
+
+def update_file_outputs(package):
+    with transaction.atomic():
+        FileOutput.objects.filter(package=package).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(UPDATE_FILE_OUTPUTS_SQL, {'package': package.pk})
+            count = cursor.rowcount
+        package.touch(decls=False)
+    return count
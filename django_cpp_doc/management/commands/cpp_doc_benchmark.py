@@ -0,0 +1,101 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.benchmark import (
+    QUERY_BUDGETS,
+    run_import,
+    run_jobs,
+    run_views,
+    timed,
+    write_dump,
+)
+from django_cpp_doc.importer import DumpError
+from django_cpp_doc.lifecycle import delete_package
+
+class Command(BaseCommand):
+    help = ('Imports a synthetic package and times the import, every view, '
+            'the recompute jobs and the export, checking each view against '
+            'its query budget.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files',
+                            type=int,
+                            default=1000,
+                            help='Number of source and header files.')
+        parser.add_argument('--decls',
+                            type=int,
+                            default=10000,
+                            help='Approximate number of declarations.')
+        parser.add_argument('--depth',
+                            type=int,
+                            default=4,
+                            help='Namespace nesting depth.')
+        parser.add_argument('--record-size',
+                            type=int,
+                            default=50,
+                            help='Members per record.')
+        parser.add_argument('--seed',
+                            type=int,
+                            default=0)
+        parser.add_argument('--dump',
+                            help='Only write the synthetic dump to this path.')
+        parser.add_argument('--keep',
+                            action='store_true',
+                            help='Keep the imported package.')
+
+    def handle(self, *args, **options):
+        generate = {
+            'slug': 'cpp-doc-benchmark',
+            'version': str(int(time.time())),
+            'files': options['files'],
+            'decls': options['decls'],
+            'depth': options['depth'],
+            'record_size': options['record_size'],
+            'seed': options['seed'],
+        }
+        if options['dump']:
+            write_dump(options['dump'], **generate)
+            return
+
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            write_dump(path, **generate)
+            try:
+                package, seconds = run_import(path)
+            except DumpError as e:
+                raise CommandError(str(e))
+        finally:
+            os.remove(path)
+        self.stdout.write('{:<24} {:>10.3f}s'.format('import', seconds))
+
+        over_budget = []
+        failed = []
+        try:
+            for name, seconds in run_jobs(package):
+                self.stdout.write('{:<24} {:>10.3f}s'.format(name, seconds))
+            for name, seconds, queries, status in run_views(package):
+                budget = QUERY_BUDGETS.get(name)
+                self.stdout.write(
+                    '{:<24} {:>10.3f}s {:>4} queries{} {}'.format(
+                        name, seconds, queries,
+                        '' if budget is None else ' (max {})'.format(budget),
+                        status))
+                if budget is not None and queries > budget:
+                    over_budget.append(name)
+                if status >= 400:
+                    failed.append('{} ({})'.format(name, status))
+        finally:
+            if not options['keep']:
+                _, seconds = timed(delete_package, package)
+                self.stdout.write('{:<24} {:>10.3f}s'.format('delete',
+                                                             seconds))
+
+        if failed:
+            raise CommandError('Failed views: {}'.format(', '.join(failed)))
+        if over_budget:
+            raise CommandError('Over query budget: {}'.format(
+                ', '.join(over_budget)))
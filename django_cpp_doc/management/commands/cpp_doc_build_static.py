@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.models import Package
+from django_cpp_doc.static import build_static
+
+class Command(BaseCommand):
+    help = ('Renders the file and declaration pages of a package version to '
+            'static HTML.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+        parser.add_argument('output',
+                            help='Directory served as the root of the site.')
+        parser.add_argument('--workers',
+                            type=int,
+                            default=1,
+                            help='Number of worker processes.')
+        parser.add_argument('--force',
+                            action='store_true',
+                            help='Render every page even if the package has '
+                                 'not changed since the last build.')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.select_related('package_name').get(
+                package_name__slug=options['slug'],
+                version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        result = build_static(package, options['output'],
+                              workers=max(1, options['workers']),
+                              force=options['force'])
+        if result is None:
+            self.stdout.write('{}: up to date'.format(package))
+        else:
+            self.stdout.write('{}: {} pages written, {} removed'.format(
+                package, *result))
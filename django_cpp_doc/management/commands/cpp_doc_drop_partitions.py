@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.partitions import drop_partitions_of, orphan_partition_ids
+
+class Command(BaseCommand):
+    help = ('Drops partitions whose package no longer exists, as left by '
+            'imports that were killed or could not drop them. Must not run '
+            'while an import is running.')
+
+    def handle(self, *args, **options):
+        package_ids = orphan_partition_ids()
+        failures = drop_partitions_of(package_ids)
+        for package_id, error in failures:
+            self.stderr.write('Package {}: {}'.format(package_id, error))
+        self.stdout.write('Dropped the partitions of {} packages'.format(
+            len(package_ids) - len(failures)))
+        if failures:
+            raise CommandError('{} of {} packages failed.'.format(
+                len(failures), len(package_ids)))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.explain import sample_queries
+from django_cpp_doc.models import Package
+
+class Command(BaseCommand):
+    help = ('Prints the query plans of the lookups behind the package, file '
+            'and declaration pages of a package version.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+        parser.add_argument('--analyze',
+                            action='store_true',
+                            help='Run the queries and include actual times '
+                                 'and buffer usage.')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(package_name__slug=options['slug'],
+                                          version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        explain_options = {}
+        if options['analyze']:
+            explain_options = {'analyze': True, 'buffers': True}
+        for name, queryset in sample_queries(package):
+            self.stdout.write('-- {}'.format(name))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
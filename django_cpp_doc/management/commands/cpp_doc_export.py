@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.export import (
+    EXPORT_FORMATS,
+    iter_csv,
+    iter_jsonl,
+    method_rows,
+    write_parquet,
+)
+from django_cpp_doc.models import Package
+
+class Command(BaseCommand):
+    help = ('Exports every method of a package version with its immutability '
+            'results and location.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+        parser.add_argument('--format',
+                            choices=EXPORT_FORMATS,
+                            default='csv')
+        parser.add_argument('--output',
+                            help='Output file (default: standard output).')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(package_name__slug=options['slug'],
+                                          version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        rows = method_rows(package)
+        if options['format'] == 'parquet':
+            # Parquet is binary, so it needs a file or the bytes underneath
+            # standard output.
+            output = options['output'] or getattr(self.stdout, 'buffer', None)
+            if output is None:
+                raise CommandError('--output is required for parquet.')
+            try:
+                write_parquet(rows, output)
+            except ImportError:
+                raise CommandError('Parquet exports require pyarrow.')
+            return
+
+        if options['format'] == 'csv':
+            chunks = iter_csv(rows)
+        else:
+            chunks = iter_jsonl(rows)
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
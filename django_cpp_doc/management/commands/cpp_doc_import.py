@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.importer import BATCH_SIZE, import_dumps
+
+class Command(BaseCommand):
+    help = 'Imports package versions from JSON-lines dumps.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dumps',
+                            nargs='+',
+                            metavar='dump',
+                            help='Path to a dump (.jsonl or .jsonl.gz), '
+                                 'or - for standard input.')
+        parser.add_argument('--batch-size',
+                            type=int,
+                            default=BATCH_SIZE,
+                            help='Rows written per INSERT.')
+        parser.add_argument('--workers',
+                            type=int,
+                            default=1,
+                            help='Number of dumps imported in parallel.')
+        parser.add_argument('--replace',
+                            action='store_true',
+                            help='Replace versions that already exist once '
+                                 'the new one is loaded.')
+
+    def handle(self, *args, **options):
+        dumps = options['dumps']
+        if '-' in dumps and len(dumps) > 1:
+            raise CommandError('Standard input must be the only dump.')
+
+        failed = []
+        for path, package, error in import_dumps(
+                dumps, batch_size=options['batch_size'],
+                replace=options['replace'],
+                workers=max(1, options['workers'])):
+            if error is None:
+                self.stdout.write('Imported {}'.format(package))
+            else:
+                self.stderr.write('{}: {}'.format(path, error))
+                failed.append(path)
+        if failed:
+            raise CommandError('{} of {} dumps failed.'.format(len(failed),
+                                                               len(dumps)))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+
+from django_cpp_doc.lifecycle import retire_package, set_current
+from django_cpp_doc.models import Package
+
+class Command(BaseCommand):
+    help = ('Makes a package version the current one, or retires it, '
+            'deleting all of its data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['current', 'retire'])
+        parser.add_argument('slug')
+        parser.add_argument('version')
+        parser.add_argument('--current',
+                            metavar='VERSION',
+                            help='Version made current in place of the '
+                                 'retired one.')
+
+    def get_package(self, slug, version):
+        try:
+            return Package.objects.select_related('package_name').get(
+                package_name__slug=slug, version=version)
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+    def handle(self, *args, **options):
+        package = self.get_package(options['slug'], options['version'])
+        if options['action'] == 'current':
+            set_current(package)
+            self.stdout.write('{} is current'.format(package))
+            return
+
+        current = None
+        if options['current']:
+            current = self.get_package(options['slug'], options['current'])
+            if current == package:
+                raise CommandError('Cannot retire the new current version.')
+        elif package.package_name.current_id == package.pk:
+            raise CommandError('{} is the current version, pass --current '
+                               'to replace it.'.format(package))
+        try:
+            retire_package(package, current)
+        except OperationalError as e:
+            # Most likely the lock timeout of dropping its partitions.
+            raise CommandError(str(e))
+        self.stdout.write('Retired {}'.format(package))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.models import Package
+from django_cpp_doc.public_views import update_public_views
+from django_cpp_doc.source_urls import resolve_source_urls
+
+class Command(BaseCommand):
+    help = 'Recomputes file source URLs after source URL rules change.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', nargs='?')
+        parser.add_argument('version', nargs='?')
+
+    def handle(self, *args, **options):
+        packages = Package.objects.all()
+        if options['slug']:
+            packages = packages.filter(package_name__slug=options['slug'])
+        if options['version']:
+            packages = packages.filter(version=options['version'])
+        if options['slug'] and not packages.exists():
+            raise CommandError('No matching package.')
+
+        for package in packages.select_related('package_name'):
+            count = resolve_source_urls(package)
+            # Public views hold member locations linked to source URLs.
+            update_public_views(package)
+            self.stdout.write('{}: {} files'.format(package, count))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.linkage import update_file_outputs
+from django_cpp_doc.models import Package
+
+class Command(BaseCommand):
+    help = ('Rebuilds the index of which outputs every file of a package '
+            'version ends up in.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(package_name__slug=options['slug'],
+                                          version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        count = update_file_outputs(package)
+        self.stdout.write('{}: {} file outputs'.format(package, count))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.immutability import update_method_results
+from django_cpp_doc.models import Package
+
+class Command(BaseCommand):
+    help = ('Propagates immutability check results through the method '
+            'dependence graph and stores which methods should be const.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(package_name__slug=options['slug'],
+                                          version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        count = update_method_results(package)
+        self.stdout.write('{}: {} method results'.format(package, count))
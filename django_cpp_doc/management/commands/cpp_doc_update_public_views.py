@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.models import Package
+from django_cpp_doc.public_views import update_public_views
+
+class Command(BaseCommand):
+    help = ('Rebuilds the public views of the own public members of a '
+            'package version\'s records, and recomputes the member kind, '
+            'access, const flag, immutability results and location stored '
+            'with those of inherited members.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(package_name__slug=options['slug'],
+                                          version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        count = update_public_views(package)
+        self.stdout.write('{}: {} public views'.format(package, count))
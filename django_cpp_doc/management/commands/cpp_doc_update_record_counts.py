@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_cpp_doc.counts import (
+    changed_record_ids,
+    update_decl_counts,
+    update_record_counts,
+)
+from django_cpp_doc.models import Package
+
+class Command(BaseCommand):
+    help = ('Recomputes the record counts of a package version and their '
+            'rollups up the decl tree.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('version')
+        parser.add_argument('--decl',
+                            type=int,
+                            nargs='+',
+                            dest='decl_ids',
+                            help='Only recompute records whose public view '
+                                 'includes these decls.')
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(package_name__slug=options['slug'],
+                                          version=options['version'])
+        except Package.DoesNotExist:
+            raise CommandError('No matching package.')
+
+        record_ids = None
+        if options['decl_ids']:
+            record_ids = changed_record_ids(options['decl_ids'])
+        count = update_record_counts(package, record_ids)
+        self.stdout.write('{}: {} records'.format(package, count))
+        count = update_decl_counts(package)
+        self.stdout.write('{}: {} decl rollups'.format(package, count))
@@ -0,0 +1,155 @@
+"""Per-view SQL, template and response size metrics.
+
+Add ``django_cpp_doc.metrics.MetricsMiddleware`` to ``MIDDLEWARE`` to log one
+JSON object per ``cpp_doc`` request to the ``django_cpp_doc.metrics`` logger:
+
+    {"db_ms": 3.1, "render_ms": 8.4, "response_bytes": 7708, "slug": "llvm",
+     "sql_queries": 9, "status": 200, "total_ms": 14.2,
+     "view": "cpp_doc:decl_detail"}
+
+Template render time includes queries run lazily from templates, which is
+where N+1 queries show up. Measuring it wraps ``Template.render`` for every
+template in the process, so it is only measured when
+``CPP_DOC_METRICS_RENDER_TIME`` is set; otherwise ``render_ms`` is null.
+
+Totals per view and package are kept in memory and served in the Prometheus
+text format by the ``metrics`` view when ``CPP_DOC_METRICS_ENDPOINT`` is set;
+each server process reports its own. Failed requests are totalled under an
+empty slug, so arbitrary URLs cannot grow the totals.
+"""
+
+import contextlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template import base
+
+logger = logging.getLogger(__name__)
+
+METRICS = [
+    ('requests_total', 'Requests served.'),
+    ('sql_queries_total', 'SQL queries executed.'),
+    ('db_seconds_total', 'Time spent executing SQL queries.'),
+    ('render_seconds_total', 'Time spent rendering templates.'),
+    ('response_bytes_total', 'Size of non-streaming responses.'),
+    ('seconds_total', 'Time spent handling requests.'),
+]
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = defaultdict(lambda: defaultdict(float))
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+_template_render = base.Template.render
+
+def timed_render(self, context):
+    metrics = getattr(_local, 'metrics', None)
+    # Included templates are rendered inside their parent, so only the
+    # outermost render is timed.
+    if metrics is None or metrics.render_depth:
+        return _template_render(self, context)
+    metrics.render_depth += 1
+    start = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        metrics.render_time += time.perf_counter() - start
+        metrics.render_depth -= 1
+
+def record(view, slug, status, metrics, seconds, size):
+    logger.info(json.dumps({
+        'view': view,
+        'slug': slug,
+        'status': status,
+        'sql_queries': metrics.queries,
+        'db_ms': round(metrics.db_time * 1000, 3),
+        'render_ms': (round(metrics.render_time * 1000, 3)
+                      if render_time_enabled() else None),
+        'total_ms': round(seconds * 1000, 3),
+        'response_bytes': size,
+    }, sort_keys=True))
+    # Only successful requests name an existing package.
+    label = slug if status < 400 else ''
+    with _lock:
+        totals = _totals[(view, label)]
+        totals['requests_total'] += 1
+        totals['sql_queries_total'] += metrics.queries
+        totals['db_seconds_total'] += metrics.db_time
+        totals['render_seconds_total'] += metrics.render_time
+        totals['response_bytes_total'] += size or 0
+        totals['seconds_total'] += seconds
+
+def render_time_enabled():
+    return getattr(settings, 'CPP_DOC_METRICS_RENDER_TIME', False)
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Installed once, however many times the middleware is built.
+        if render_time_enabled() and base.Template.render is not timed_render:
+            base.Template.render = timed_render
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        seconds = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if (match is None or match.namespace != 'cpp_doc' or
+                match.url_name == 'metrics'):
+            return response
+        size = None if response.streaming else len(response.content)
+        record(match.view_name, match.kwargs.get('slug', ''),
+               response.status_code, metrics, seconds, size)
+        return response
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+def metrics(request):
+    if not getattr(settings, 'CPP_DOC_METRICS_ENDPOINT', False):
+        raise Http404("Metrics are disabled.")
+    with _lock:
+        totals = {key: dict(values) for key, values in _totals.items()}
+    lines = []
+    for name, help_text in METRICS:
+        if name == 'render_seconds_total' and not render_time_enabled():
+            continue
+        lines.append('# HELP cpp_doc_{} {}'.format(name, help_text))
+        lines.append('# TYPE cpp_doc_{} counter'.format(name))
+        for (view, slug), values in sorted(totals.items()):
+            lines.append('cpp_doc_{}{{view="{}",slug="{}"}} {}'.format(
+                name, escape_label(view), escape_label(slug),
+                repr(values.get(name, 0.0))))
+    return HttpResponse('\n'.join(lines) + '\n',
+                        content_type='text/plain; version=0.0.4')
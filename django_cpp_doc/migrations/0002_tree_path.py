@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+TREE_PATH_SQL = '''
+WITH RECURSIVE tree(id, tree_path, depth) AS (
+    SELECT id, id || '/', 0 FROM {table} WHERE parent_id IS NULL
+  UNION ALL
+    SELECT child.id, tree.tree_path || child.id || '/', tree.depth + 1
+    FROM {table} child JOIN tree ON child.parent_id = tree.id
+)
+UPDATE {table} SET tree_path = tree.tree_path, depth = tree.depth
+FROM tree WHERE {table}.id = tree.id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='decl',
+            name='depth',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='decl',
+            name='tree_path',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=1024),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='filedescriptor',
+            name='depth',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='filedescriptor',
+            name='tree_path',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=1024),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(TREE_PATH_SQL.format(table='cpp_doc_decl'),
+                          migrations.RunSQL.noop),
+        migrations.RunSQL(TREE_PATH_SQL.format(table='cpp_doc_file_descriptor'),
+                          migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,94 @@
+from django.db import migrations, models
+
+LLVM_REPOSITORIES = [
+    ('tools/clang/tools/extra/', 'clang-tools-extra'),
+    ('tools/clang/', 'clang'),
+    ('tools/lldb/', 'lldb'),
+    ('tools/lld/', 'lld'),
+    ('projects/compiler-rt/', 'compiler-rt'),
+    ('', 'llvm'),
+]
+
+RULES = [
+    ('ninja', '', '', 'https://github.com/ninja-build/ninja/tree/v{version}/{path}'),
+    ('mosh', '', '', 'https://github.com/mobile-shell/mosh/tree/mosh-{version}/{path}'),
+    ('fish', '', 'fish-shell-{version}/', 'https://github.com/fish-shell/fish-shell/tree/{version}/{path}'),
+    ('opencv', '', '', 'https://github.com/opencv/opencv/tree/{version}/{path}'),
+    ('protobuf', '', '', 'https://github.com/google/protobuf/tree/v{version}/{path}'),
+    ('bitcoin', '', '', 'https://github.com/bitcoin/bitcoin/tree/v{version}/{path}'),
+    ('libsequence', '', 'libsequence-{version}/', 'https://github.com/molpopgen/libsequence/tree/{version}/{path}'),
+]
+for version, tag in [('4.0.0', 'release_40'), ('5.0.0', 'release_50')]:
+    RULES.append(('llvm', version, 'build', ''))
+    for prefix, repository in LLVM_REPOSITORIES:
+        RULES.append(('llvm', version, prefix,
+                      'https://github.com/llvm-mirror/{}/tree/{}/{{path}}'.format(repository, tag)))
+
+RESOLVE_SOURCE_URLS_SQL = '''
+UPDATE cpp_doc_file_descriptor fd
+SET source_url = COALESCE((
+    SELECT replace(replace(rule.url_template, '{version}', p.version),
+                   '{path}', substr(fd.path, length(rule.prefix) + 1))
+    FROM (
+        SELECT r.version, r.url_template,
+               replace(r.prefix, '{version}', p.version) AS prefix
+        FROM cpp_doc_source_url_rule r
+        WHERE r.slug = n.slug AND r.version IN ('', p.version)
+    ) rule
+    WHERE left(fd.path, length(rule.prefix)) = rule.prefix
+    ORDER BY length(rule.prefix) DESC, rule.version DESC
+    LIMIT 1
+), '')
+FROM cpp_doc_package p
+JOIN cpp_doc_package_name n ON n.id = p.package_name_id
+WHERE fd.package_id = p.id
+'''
+
+def add_rules(apps, schema_editor):
+    SourceUrlRule = apps.get_model('django_cpp_doc', 'SourceUrlRule')
+    SourceUrlRule.objects.bulk_create([
+        SourceUrlRule(slug=slug, version=version, prefix=prefix,
+                      url_template=url_template)
+        for slug, version, prefix, url_template in RULES
+    ])
+
+def remove_rules(apps, schema_editor):
+    SourceUrlRule = apps.get_model('django_cpp_doc', 'SourceUrlRule')
+    SourceUrlRule.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0002_tree_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceUrlRule',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField()),
+                ('version', models.CharField(blank=True, max_length=50)),
+                ('prefix', models.CharField(blank=True, max_length=4096)),
+                ('url_template', models.CharField(blank=True, max_length=4096)),
+            ],
+            options={
+                'verbose_name': 'Source URL Rule',
+                'verbose_name_plural': 'Source URL Rules',
+                'db_table': 'cpp_doc_source_url_rule',
+                'ordering': ['slug', 'version', 'prefix'],
+            },
+        ),
+        migrations.AddField(
+            model_name='filedescriptor',
+            name='source_url',
+            field=models.CharField(blank=True, max_length=8192),
+        ),
+        migrations.AlterUniqueTogether(
+            name='sourceurlrule',
+            unique_together={('slug', 'version', 'prefix')},
+        ),
+        migrations.RunPython(add_rules, remove_rules),
+        migrations.RunSQL(RESOLVE_SOURCE_URLS_SQL, migrations.RunSQL.noop),
+    ]
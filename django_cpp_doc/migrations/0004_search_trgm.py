@@ -0,0 +1,28 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0003_source_url_rule'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            'CREATE INDEX cpp_doc_decl_name_trgm ON cpp_doc_decl '
+            'USING gin (name gin_trgm_ops)',
+            'DROP INDEX cpp_doc_decl_name_trgm',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX cpp_doc_decl_path_trgm ON cpp_doc_decl '
+            'USING gin (path gin_trgm_ops)',
+            'DROP INDEX cpp_doc_decl_path_trgm',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX cpp_doc_method_decl_mangled_name_trgm '
+            'ON cpp_doc_method_decl USING gin (mangled_name gin_trgm_ops)',
+            'DROP INDEX cpp_doc_method_decl_mangled_name_trgm',
+        ),
+    ]
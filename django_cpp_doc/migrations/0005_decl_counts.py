@@ -0,0 +1,59 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0004_search_trgm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeclCounts',
+            fields=[
+                ('num_methods', models.PositiveIntegerField()),
+                ('num_mutable_methods', models.PositiveIntegerField()),
+                ('num_mutable_no_easy', models.PositiveIntegerField()),
+                ('num_mutable_no_easy_non_stub', models.PositiveIntegerField()),
+                ('num_mutable_no_odd', models.PositiveIntegerField()),
+                ('num_mutable_maybe', models.PositiveIntegerField()),
+                ('num_mutable_no_ret_noop', models.PositiveIntegerField()),
+                ('num_mutable_no_ret_field_t', models.PositiveIntegerField()),
+                ('num_mutable_no_ret_field_nt', models.PositiveIntegerField()),
+                ('num_mutable_no_ret_other', models.PositiveIntegerField()),
+                ('num_mutable_maybe_ret_noop', models.PositiveIntegerField()),
+                ('num_mutable_maybe_ret_field_t', models.PositiveIntegerField()),
+                ('num_mutable_maybe_ret_field_nt', models.PositiveIntegerField()),
+                ('num_mutable_maybe_ret_other', models.PositiveIntegerField()),
+                ('num_const_methods', models.PositiveIntegerField()),
+                ('num_const_no_easy', models.PositiveIntegerField()),
+                ('num_const_no_odd', models.PositiveIntegerField()),
+                ('num_const_maybe', models.PositiveIntegerField()),
+                ('num_const_no_ret_noop', models.PositiveIntegerField()),
+                ('num_const_no_ret_field_t', models.PositiveIntegerField()),
+                ('num_const_no_ret_field_nt', models.PositiveIntegerField()),
+                ('num_const_no_ret_other', models.PositiveIntegerField()),
+                ('num_const_maybe_ret_noop', models.PositiveIntegerField()),
+                ('num_const_maybe_ret_field_t', models.PositiveIntegerField()),
+                ('num_const_maybe_ret_field_nt', models.PositiveIntegerField()),
+                ('num_const_maybe_ret_other', models.PositiveIntegerField()),
+                ('num_fields', models.PositiveIntegerField()),
+                ('num_mutable_fields', models.PositiveIntegerField()),
+                ('num_explicit_fields', models.PositiveIntegerField()),
+                ('num_transitive_fields', models.PositiveIntegerField()),
+                ('num_only_explicit_fields', models.PositiveIntegerField()),
+                ('num_only_transitive_fields', models.PositiveIntegerField()),
+                ('num_neither_explicit_transitive_fields', models.PositiveIntegerField()),
+                ('num_both_explicit_transitive_fields', models.PositiveIntegerField()),
+                ('decl', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='subtree_counts', serialize=False, to='django_cpp_doc.Decl')),
+                ('num_records', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Decl Counts',
+                'verbose_name_plural': 'Decl Counts',
+                'db_table': 'cpp_doc_decl_counts',
+                'abstract': False,
+            },
+        ),
+    ]
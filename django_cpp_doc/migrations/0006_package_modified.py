@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0005_decl_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
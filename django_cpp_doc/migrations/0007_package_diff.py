@@ -0,0 +1,49 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0006_package_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageDiff',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_modified', models.DateTimeField()),
+                ('new_modified', models.DateTimeField()),
+                ('new', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='diffs_to', to='django_cpp_doc.Package')),
+                ('old', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='diffs_from', to='django_cpp_doc.Package')),
+            ],
+            options={
+                'verbose_name': 'Package Diff',
+                'verbose_name_plural': 'Package Diffs',
+                'db_table': 'cpp_doc_package_diff',
+            },
+        ),
+        migrations.CreateModel(
+            name='PackageDiffEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveIntegerField(choices=[(0, 'Method'), (1, 'Field')])),
+                ('change', models.PositiveIntegerField(choices=[(0, 'Added'), (1, 'Removed'), (2, 'Changed')])),
+                ('path', models.CharField(blank=True, max_length=8192)),
+                ('diff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='django_cpp_doc.PackageDiff')),
+                ('new_decl', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='django_cpp_doc.Decl')),
+                ('old_decl', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='django_cpp_doc.Decl')),
+            ],
+            options={
+                'verbose_name': 'Package Diff Entry',
+                'verbose_name_plural': 'Package Diff Entries',
+                'db_table': 'cpp_doc_package_diff_entry',
+                'ordering': ['path'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='packagediff',
+            unique_together={('old', 'new')},
+        ),
+    ]
@@ -0,0 +1,69 @@
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+INTERN_SQL = '''
+INSERT INTO cpp_doc_compile_argument (package_id, value)
+SELECT DISTINCT package_id, unnest(command_line)
+FROM cpp_doc_compile_command;
+
+UPDATE cpp_doc_compile_command c
+SET arguments = ARRAY(
+    SELECT a.id
+    FROM unnest(c.command_line) WITH ORDINALITY AS u(value, n)
+    JOIN cpp_doc_compile_argument a
+      ON a.package_id = c.package_id AND a.value = u.value
+    ORDER BY u.n);
+'''
+
+EXPAND_SQL = '''
+UPDATE cpp_doc_compile_command c
+SET command_line = ARRAY(
+    SELECT a.value
+    FROM unnest(c.arguments) WITH ORDINALITY AS u(id, n)
+    JOIN cpp_doc_compile_argument a ON a.id = u.id
+    ORDER BY u.n);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0007_package_diff'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompileArgument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(blank=True, max_length=256)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compile_arguments', to='django_cpp_doc.Package')),
+            ],
+            options={
+                'verbose_name': 'Compile Argument',
+                'verbose_name_plural': 'Compile Arguments',
+                'db_table': 'cpp_doc_compile_argument',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='compileargument',
+            unique_together={('package', 'value')},
+        ),
+        migrations.AddField(
+            model_name='compilecommand',
+            name='arguments',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=256),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='compilecommand',
+            name='command_line',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=256), blank=True, default=list, size=256),
+        ),
+        migrations.RunSQL(INTERN_SQL, EXPAND_SQL),
+        migrations.RemoveField(
+            model_name='compilecommand',
+            name='command_line',
+        ),
+    ]
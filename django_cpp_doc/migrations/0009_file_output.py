@@ -0,0 +1,70 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Same as linkage.UPDATE_FILE_OUTPUTS_SQL at the time of this migration.
+UPDATE_FILE_OUTPUTS_SQL = '''
+INSERT INTO cpp_doc_file_output
+    (package_id, file_id, output_id, is_direct, is_source)
+WITH RECURSIVE edge(file_id, output_id) AS (
+    SELECT file_id, output_id FROM cpp_doc_compile_command
+    WHERE package_id = %(package)s AND output_id IS NOT NULL
+    UNION
+    SELECT file_id, output_id FROM cpp_doc_linkage
+    WHERE package_id = %(package)s
+), reach(file_id, output_id) AS (
+    SELECT file_id, output_id FROM edge
+    UNION
+    SELECT r.file_id, e.output_id
+    FROM reach r
+    JOIN edge e ON e.file_id = r.output_id
+)
+SELECT %(package)s, r.file_id, r.output_id,
+       EXISTS (SELECT 1 FROM edge e
+               WHERE e.file_id = r.file_id AND e.output_id = r.output_id),
+       EXISTS (SELECT 1 FROM cpp_doc_compile_command c
+               WHERE c.file_id = r.file_id)
+FROM reach r
+WHERE r.file_id <> r.output_id
+'''
+
+def update_file_outputs(apps, schema_editor):
+    Package = apps.get_model('django_cpp_doc', 'Package')
+    with schema_editor.connection.cursor() as cursor:
+        for pk in Package.objects.values_list('pk', flat=True):
+            cursor.execute(UPDATE_FILE_OUTPUTS_SQL, {'package': pk})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0008_compile_argument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileOutput',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_direct', models.BooleanField()),
+                ('is_source', models.BooleanField()),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reachable_outputs', to='django_cpp_doc.FileDescriptor')),
+                ('output', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reachable_files', to='django_cpp_doc.FileDescriptor')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='file_outputs', to='django_cpp_doc.Package')),
+            ],
+            options={
+                'verbose_name': 'File Output',
+                'verbose_name_plural': 'File Outputs',
+                'db_table': 'cpp_doc_file_output',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='fileoutput',
+            index=models.Index(fields=['output', 'file'], name='cpp_doc_file_output_output'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='fileoutput',
+            unique_together={('file', 'output')},
+        ),
+        migrations.RunPython(update_file_outputs,
+                             migrations.RunPython.noop),
+    ]
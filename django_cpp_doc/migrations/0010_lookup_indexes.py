@@ -0,0 +1,34 @@
+from django.db import migrations
+
+INDEXES = [
+    # Root lookups: (package, parent IS NULL).
+    ('cpp_doc_file_descriptor_root', 'cpp_doc_file_descriptor',
+     '(package_id) WHERE parent_id IS NULL'),
+    ('cpp_doc_decl_root', 'cpp_doc_decl',
+     '(package_id) WHERE parent_id IS NULL'),
+    # Child listings are paged by path, so (parent, path) serves both the
+    # filter and the keyset order without a sort.
+    ('cpp_doc_file_descriptor_parent_path', 'cpp_doc_file_descriptor',
+     '(parent_id, path)'),
+    ('cpp_doc_decl_parent_path', 'cpp_doc_decl',
+     '(parent_id, path)'),
+]
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently so imported packages stay readable.
+    atomic = False
+
+    dependencies = [
+        ('django_cpp_doc', '0009_file_output'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} {}'.format(
+                name, table, columns),
+            'DROP INDEX CONCURRENTLY IF EXISTS {}'.format(name),
+        )
+        for name, table, columns in INDEXES
+    ]
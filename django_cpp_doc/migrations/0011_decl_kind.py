@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+SUBTYPES = [
+    (1, 'cpp_doc_namespace_decl'),
+    (2, 'cpp_doc_record_decl'),
+    (3, 'cpp_doc_method_decl'),
+    (4, 'cpp_doc_field_decl'),
+    (5, 'cpp_doc_function_decl'),
+]
+
+INDEXES = [
+    # Child listings by kind, paged by path.
+    ('cpp_doc_decl_parent_kind_path', '(parent_id, kind, path)'),
+    # API listings of a package's decls by kind.
+    ('cpp_doc_decl_package_kind_path', '(package_id, kind, path)'),
+]
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently so imported packages stay readable.
+    atomic = False
+
+    dependencies = [
+        ('django_cpp_doc', '0010_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='decl',
+            name='kind',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Namespace'), (2, 'Record'), (3, 'Method'), (4, 'Field'), (5, 'Function')], default=0),
+        ),
+    ] + [
+        migrations.RunSQL(
+            'UPDATE cpp_doc_decl d SET kind = {} FROM {} s '
+            'WHERE s.decl_id = d.id'.format(kind, table),
+            migrations.RunSQL.noop,
+        )
+        for kind, table in SUBTYPES
+    ] + [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON cpp_doc_decl {}'
+            .format(name, columns),
+            'DROP INDEX CONCURRENTLY IF EXISTS {}'.format(name),
+        )
+        for name, columns in INDEXES
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0011_decl_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packagename',
+            name='current',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='django_cpp_doc.Package'),
+        ),
+    ]
@@ -0,0 +1,226 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+PARTITIONED_TABLES = [
+    'cpp_doc_file_descriptor',
+    'cpp_doc_presumed_loc',
+    'cpp_doc_decl',
+    'cpp_doc_public_view',
+]
+
+BACKFILL_SQL = [
+    # The new foreign keys are deferred, and pending trigger events would
+    # keep the tables below from being altered in this transaction.
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    '''UPDATE cpp_doc_presumed_loc l SET package_id = f.package_id
+FROM cpp_doc_file_descriptor f WHERE f.id = l.file_id''',
+    '''UPDATE cpp_doc_public_view v SET package_id = d.package_id
+FROM cpp_doc_decl d WHERE d.id = v.record_id''',
+]
+
+# Replaces a table with one partitioned by package_id, with a partition per
+# package. Unique constraints have to include the partition key, so
+# package_id is added to those that lack it and to the primary key. Foreign
+# keys to the table are dropped, as PostgreSQL before 12 cannot enforce them.
+PARTITION_SQL = '''
+DO $$
+DECLARE
+    r record;
+    id_sequence text := pg_get_serial_sequence('{table}', 'id');
+    definitions text[];
+    definition text;
+BEGIN
+    FOR r IN SELECT conrelid::regclass AS referencing, conname
+             FROM pg_constraint
+             WHERE contype = 'f' AND confrelid = '{table}'::regclass LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I',
+                       r.referencing, r.conname);
+    END LOOP;
+
+    SELECT coalesce(array_agg(d ORDER BY n), ARRAY[]::text[])
+    INTO definitions
+    FROM (
+        SELECT 1 AS n, format(
+            'ALTER TABLE {table} ADD CONSTRAINT %I %s', conname,
+            CASE WHEN contype = 'u'
+                      AND pg_get_constraintdef(oid) NOT LIKE '%package_id%'
+                 THEN replace(pg_get_constraintdef(oid), 'UNIQUE (',
+                              'UNIQUE (package_id, ')
+                 ELSE pg_get_constraintdef(oid) END) AS d
+        FROM pg_constraint
+        WHERE conrelid = '{table}'::regclass AND contype IN ('u', 'f')
+        UNION ALL
+        SELECT 2, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = '{table}'::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c
+                          WHERE c.conrelid = i.indrelid
+                            AND c.conindid = i.indexrelid)
+    ) definition_rows;
+
+    ALTER TABLE {table} RENAME TO {table}_unpartitioned;
+    CREATE TABLE {table} (
+        LIKE {table}_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY LIST (package_id);
+    FOR r IN SELECT id FROM cpp_doc_package LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF {table} '
+                       'FOR VALUES IN (%s)', '{table}_p' || r.id, r.id);
+    END LOOP;
+    INSERT INTO {table} SELECT * FROM {table}_unpartitioned;
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id', id_sequence);
+    DROP TABLE {table}_unpartitioned;
+
+    ALTER TABLE {table} ADD PRIMARY KEY (id, package_id);
+    FOREACH definition IN ARRAY definitions LOOP
+        EXECUTE definition;
+    END LOOP;
+END
+$$
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0012_package_name_current'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presumedloc',
+            name='package',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='presumed_locs', to='django_cpp_doc.Package'),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='package',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='public_views', to='django_cpp_doc.Package'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='presumedloc',
+            name='package',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presumed_locs', to='django_cpp_doc.Package'),
+        ),
+        migrations.AlterField(
+            model_name='publicview',
+            name='package',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='public_views', to='django_cpp_doc.Package'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL([PARTITION_SQL.format(table=table)])
+                for table in PARTITIONED_TABLES
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='compilecommand',
+                    name='directory',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='compile_command_directories', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='compilecommand',
+                    name='file',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='compile_command_files', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='compilecommand',
+                    name='output',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='compile_command_outputs', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='decl',
+                    name='parent',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='decl',
+                    name='presumed_loc',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='decls', to='django_cpp_doc.PresumedLoc'),
+                ),
+                migrations.AlterField(
+                    model_name='declcounts',
+                    name='decl',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='subtree_counts', serialize=False, to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='fielddecl',
+                    name='decl',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='field', serialize=False, to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='filedescriptor',
+                    name='parent',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='fileoutput',
+                    name='file',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='reachable_outputs', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='fileoutput',
+                    name='output',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='reachable_files', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='functiondecl',
+                    name='decl',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='function', serialize=False, to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='linkage',
+                    name='file',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='linkage_files', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='linkage',
+                    name='output',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='linkage_outputs', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='methoddecl',
+                    name='decl',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='method', serialize=False, to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='namespacedecl',
+                    name='decl',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='namespace', serialize=False, to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='packagediffentry',
+                    name='new_decl',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='packagediffentry',
+                    name='old_decl',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='presumedloc',
+                    name='file',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='presumed_locs', to='django_cpp_doc.FileDescriptor'),
+                ),
+                migrations.AlterField(
+                    model_name='publicview',
+                    name='decl',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='public_view', to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterField(
+                    model_name='recorddecl',
+                    name='decl',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='record', serialize=False, to='django_cpp_doc.Decl'),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='presumedloc',
+                    unique_together={('package', 'file', 'line', 'col')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='publicview',
+                    unique_together={('package', 'record', 'decl')},
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,108 @@
+from django.db import migrations, models
+
+# Same as public_views.UPDATE_PUBLIC_VIEWS_SQL at the time of this migration.
+UPDATE_PUBLIC_VIEWS_SQL = '''
+UPDATE cpp_doc_public_view v
+SET kind = d.kind,
+    path = d.path,
+    access = COALESCE(m.access, f.access),
+    is_inherited = d.parent_id IS DISTINCT FROM v.record_id,
+    is_const = COALESCE(m.is_const, FALSE),
+    is_mutable = COALESCE(f.is_mutable, FALSE),
+    mutate_result = mc.mutate_result,
+    return_result = mc.return_result,
+    is_transitive = fc.is_transitive,
+    is_explicit = fc.is_explicit,
+    location_url = CASE WHEN fd.source_url <> ''
+                        THEN fd.source_url || '#L' || l.line
+                        ELSE '' END
+FROM cpp_doc_decl d
+LEFT JOIN cpp_doc_method_decl m ON m.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_method mc ON mc.method_id = d.id
+LEFT JOIN cpp_doc_field_decl f ON f.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_field fc ON fc.field_id = d.id
+LEFT JOIN cpp_doc_presumed_loc l
+    ON l.id = d.presumed_loc_id AND l.package_id = d.package_id
+LEFT JOIN cpp_doc_file_descriptor fd
+    ON fd.id = l.file_id AND fd.package_id = d.package_id
+WHERE d.id = v.decl_id
+  AND d.package_id = %(package)s
+  AND v.package_id = %(package)s
+'''
+
+def update_public_views(apps, schema_editor):
+    Package = apps.get_model('django_cpp_doc', 'Package')
+    with schema_editor.connection.cursor() as cursor:
+        for pk in Package.objects.values_list('pk', flat=True):
+            cursor.execute(UPDATE_PUBLIC_VIEWS_SQL, {'package': pk})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0013_partition_by_package'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicview',
+            name='access',
+            field=models.PositiveIntegerField(blank=True, choices=[(0, 'Public'), (1, 'Protected'), (2, 'Private'), (3, 'None')], null=True),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='is_const',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='is_explicit',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='is_inherited',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='is_mutable',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='is_transitive',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='kind',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Namespace'), (2, 'Record'), (3, 'Method'), (4, 'Field'), (5, 'Function')], default=0),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='location_url',
+            field=models.CharField(blank=True, max_length=8192),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='mutate_result',
+            field=models.PositiveIntegerField(blank=True, choices=[(1, 'No'), (2, 'Maybe')], null=True),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='path',
+            field=models.CharField(blank=True, max_length=8192),
+        ),
+        migrations.AddField(
+            model_name='publicview',
+            name='return_result',
+            field=models.PositiveIntegerField(blank=True, choices=[(1, 'Noop'), (2, 'Field (Transitive)'), (3, 'Field (Non-transitive)'), (4, 'Other')], null=True),
+        ),
+        migrations.RunPython(update_public_views,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='publicview',
+            index=models.Index(fields=['record', 'kind', 'path'], name='cpp_doc_public_view_members'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.1.15 on 2026-10-18 10:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0014_public_view_members'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='decl',
+            name='package',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='decl_contexts', to='django_cpp_doc.Package'),
+        ),
+        migrations.AlterField(
+            model_name='filedescriptor',
+            name='package',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='file_descriptors', to='django_cpp_doc.Package'),
+        ),
+        migrations.AlterField(
+            model_name='presumedloc',
+            name='package',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='presumed_locs', to='django_cpp_doc.Package'),
+        ),
+        migrations.AlterField(
+            model_name='publicview',
+            name='package',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='public_views', to='django_cpp_doc.Package'),
+        ),
+        migrations.AlterField(
+            model_name='publicview',
+            name='record',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='public_view', to='django_cpp_doc.RecordDecl'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0015_unenforced_partition_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='decls_modified',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='files_modified',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
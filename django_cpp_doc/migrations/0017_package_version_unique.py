@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Replacing an import inserts the new package before deleting the old one in
+# the same transaction, so the constraint is only checked at commit. Django
+# cannot declare deferrable constraints, hence the separate state. Duplicate
+# versions imported before this migration have to be deleted first.
+UNIQUE_SQL = '''
+ALTER TABLE cpp_doc_package
+ADD CONSTRAINT cpp_doc_package_package_name_id_version_uniq
+UNIQUE (package_name_id, version) DEFERRABLE INITIALLY DEFERRED
+'''
+
+DROP_UNIQUE_SQL = '''
+ALTER TABLE cpp_doc_package
+DROP CONSTRAINT cpp_doc_package_package_name_id_version_uniq
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0016_package_page_stamps'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(UNIQUE_SQL, DROP_UNIQUE_SQL),
+            ],
+            state_operations=[
+                migrations.AlterUniqueTogether(
+                    name='package',
+                    unique_together={('package_name', 'version')},
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.db import migrations
+from django.utils import timezone
+
+# Same as the statements of public_views.update_public_views() at the time of
+# this migration. Own members get rows from their access, replacing those
+# from the dump; the dump's rows are kept for inherited members only.
+DELETE_OWN_MEMBERS_SQL = '''
+DELETE FROM cpp_doc_public_view v
+USING cpp_doc_decl d
+WHERE d.id = v.decl_id
+  AND d.parent_id = v.record_id
+  AND d.package_id = %(package)s
+  AND v.package_id = %(package)s
+'''
+
+INSERT_OWN_MEMBERS_SQL = '''
+INSERT INTO cpp_doc_public_view
+    (package_id, record_id, decl_id, is_inherited, kind, path, access,
+     is_const, is_mutable, mutate_result, return_result, is_transitive,
+     is_explicit, location_url)
+SELECT %(package)s, d.parent_id, d.id, FALSE, d.kind, d.path,
+       COALESCE(m.access, f.access),
+       COALESCE(m.is_const, FALSE),
+       COALESCE(f.is_mutable, FALSE),
+       mc.mutate_result,
+       mc.return_result,
+       fc.is_transitive,
+       fc.is_explicit,
+       CASE WHEN fd.source_url <> ''
+            THEN fd.source_url || '#L' || l.line
+            ELSE '' END
+FROM cpp_doc_decl d
+JOIN cpp_doc_record_decl r ON r.decl_id = d.parent_id
+LEFT JOIN cpp_doc_method_decl m ON m.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_method mc ON mc.method_id = d.id
+LEFT JOIN cpp_doc_field_decl f ON f.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_field fc ON fc.field_id = d.id
+LEFT JOIN cpp_doc_presumed_loc l
+    ON l.id = d.presumed_loc_id AND l.package_id = d.package_id
+LEFT JOIN cpp_doc_file_descriptor fd
+    ON fd.id = l.file_id AND fd.package_id = d.package_id
+WHERE d.package_id = %(package)s
+  AND d.kind IN (3, 4)
+  AND COALESCE(m.access, f.access) = 0
+'''
+
+UPDATE_INHERITED_MEMBERS_SQL = '''
+UPDATE cpp_doc_public_view v
+SET is_inherited = TRUE,
+    kind = d.kind,
+    path = d.path,
+    access = COALESCE(m.access, f.access),
+    is_const = COALESCE(m.is_const, FALSE),
+    is_mutable = COALESCE(f.is_mutable, FALSE),
+    mutate_result = mc.mutate_result,
+    return_result = mc.return_result,
+    is_transitive = fc.is_transitive,
+    is_explicit = fc.is_explicit,
+    location_url = CASE WHEN fd.source_url <> ''
+                        THEN fd.source_url || '#L' || l.line
+                        ELSE '' END
+FROM cpp_doc_decl d
+LEFT JOIN cpp_doc_method_decl m ON m.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_method mc ON mc.method_id = d.id
+LEFT JOIN cpp_doc_field_decl f ON f.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_field fc ON fc.field_id = d.id
+LEFT JOIN cpp_doc_presumed_loc l
+    ON l.id = d.presumed_loc_id AND l.package_id = d.package_id
+LEFT JOIN cpp_doc_file_descriptor fd
+    ON fd.id = l.file_id AND fd.package_id = d.package_id
+WHERE d.id = v.decl_id
+  AND d.parent_id IS DISTINCT FROM v.record_id
+  AND d.package_id = %(package)s
+  AND v.package_id = %(package)s
+'''
+
+def update_public_views(apps, schema_editor):
+    Package = apps.get_model('django_cpp_doc', 'Package')
+    with schema_editor.connection.cursor() as cursor:
+        for pk in Package.objects.values_list('pk', flat=True):
+            for sql in [DELETE_OWN_MEMBERS_SQL, INSERT_OWN_MEMBERS_SQL,
+                        UPDATE_INHERITED_MEMBERS_SQL]:
+                cursor.execute(sql, {'package': pk})
+    # Record pages list the new rows.
+    now = timezone.now()
+    Package.objects.update(modified=now, decls_modified=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0017_package_version_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(update_public_views,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Subtree pages select a few levels of a subtree: (package, depth range,
+# tree_path prefix). With depth before tree_path, each level is one range of
+# the index. The pattern operator class serves the prefix LIKE whatever the
+# database collation.
+INDEXES = [
+    ('cpp_doc_file_descriptor_subtree', 'cpp_doc_file_descriptor',
+     '(package_id, depth, tree_path varchar_pattern_ops)'),
+    ('cpp_doc_decl_subtree', 'cpp_doc_decl',
+     '(package_id, depth, tree_path varchar_pattern_ops)'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_cpp_doc', '0018_public_view_own_members'),
+    ]
+
+    # Partitioned tables cannot be indexed concurrently; the index is created
+    # on every partition.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS {} ON {} {}'.format(
+                name, table, columns),
+            'DROP INDEX IF EXISTS {}'.format(name),
+        )
+        for name, table, columns in INDEXES
+    ]
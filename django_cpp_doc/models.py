@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.utils import timezone
 
 class PackageName(models.Model):
     name = models.CharField(max_length=256,
@@ -8,6 +9,13 @@ class PackageName(models.Model):
     slug = models.SlugField(max_length=50,
                             null=False,
                             blank=False)
+    # The version served under /current/. Flipped in the same transaction
+    # that retires or replaces the version it pointed to.
+    current = models.ForeignKey('Package',
+                                on_delete=models.SET_NULL,
+                                null=True,
+                                blank=True,
+                                related_name='+')
 
     def __str__(self):
         return self.name
@@ -25,22 +33,113 @@ class Package(models.Model):
     version = models.CharField(max_length=50,
                                null=False,
                                blank=False)
+    # Changes whenever imported or derived data changes, invalidating
+    # cached pages of this package version.
+    modified = models.DateTimeField(default=timezone.now)
+    # Change with the data shown on file and declaration pages respectively,
+    # so a static build only renders the pages that may have changed.
+    files_modified = models.DateTimeField(default=timezone.now)
+    decls_modified = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return '{} {}'.format(str(self.package_name), self.version)
 
+    def touch(self, files=True, decls=True):
+        self.modified = timezone.now()
+        stamps = {'modified': self.modified}
+        if files:
+            self.files_modified = stamps['files_modified'] = self.modified
+        if decls:
+            self.decls_modified = stamps['decls_modified'] = self.modified
+        Package.objects.filter(pk=self.pk).update(**stamps)
+
     class Meta:
         db_table = 'cpp_doc_package'
         ordering = ['package_name', 'version']
+        # Deferred in the database (see migration 0017), so an import can
+        # insert a version before deleting the one it replaces.
+        unique_together = [('package_name', 'version')]
+
+class TreeNodeBase(models.Model):
+    # Materialized path of primary keys from the root down to and including
+    # this node, e.g. '1/5/9/'. Kept up to date by the importer.
+    tree_path = models.CharField(max_length=1024,
+                                 null=False,
+                                 blank=True,
+                                 db_index=True)
+    depth = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def make_tree_path(pk, parent_tree_path=''):
+        return '{}{}/'.format(parent_tree_path, pk)
+
+    def get_ancestor_ids(self):
+        return [int(pk) for pk in self.tree_path.split('/')[:-2]]
+
+    # Filtering on the package as well lets PostgreSQL only scan the
+    # package's partition.
+    def get_ancestors(self):
+        return type(self).objects.filter(
+            package=self.package_id,
+            pk__in=self.get_ancestor_ids()).order_by('depth')
+
+    def get_children(self):
+        return type(self).objects.filter(package=self.package_id,
+                                         parent=self)
+
+    def get_descendants(self):
+        return type(self).objects.filter(
+            package=self.package_id,
+            tree_path__startswith=self.tree_path).exclude(pk=self.pk)
+
+    class Meta:
+        abstract = True
+
+class SourceUrlRule(models.Model):
+    # Files of a package are linked with the rule that has the longest
+    # matching path prefix, preferring rules for the exact version over rules
+    # for every version (blank). Both prefix and url_template may contain
+    # {version}, url_template also {path} (the file path without the prefix).
+    # A blank url_template means files under the prefix have no link.
+    slug = models.SlugField(max_length=50,
+                            null=False,
+                            blank=False)
+    version = models.CharField(max_length=50,
+                               null=False,
+                               blank=True)
+    prefix = models.CharField(max_length=4096,
+                              null=False,
+                              blank=True)
+    url_template = models.CharField(max_length=4096,
+                                    null=False,
+                                    blank=True)
 
-class FileDescriptor(models.Model):
+    def __str__(self):
+        return '{} {} {}'.format(self.slug, self.version, self.prefix)
+
+    class Meta:
+        db_table = 'cpp_doc_source_url_rule'
+        verbose_name = 'Source URL Rule'
+        verbose_name_plural = 'Source URL Rules'
+        unique_together = ('slug', 'version', 'prefix')
+        ordering = ['slug', 'version', 'prefix']
+
+# FileDescriptor, PresumedLoc, Decl and PublicView are partitioned by package
+# (see partitions.py). PostgreSQL before 12 cannot enforce foreign keys to
+# partitioned tables, so references to them have db_constraint=False. Their
+# own references to Package and RecordDecl are not enforced either: a replaced
+# package is deleted when its replacement commits, but its partitions are only
+# dropped once no import is running (see importer.import_dumps()).
+class FileDescriptor(TreeNodeBase):
     package = models.ForeignKey(Package,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 related_name='file_descriptors')
     parent = models.ForeignKey('FileDescriptor',
                                on_delete=models.CASCADE,
+                               db_constraint=False,
                                null=True,
                                blank=True,
                                related_name='children')
@@ -50,9 +149,13 @@ class FileDescriptor(models.Model):
     path = models.CharField(max_length=4096,
                             null=False,
                             blank=True)
+    # Resolved from SourceUrlRule, empty if the file has no public source.
+    source_url = models.CharField(max_length=8192,
+                                  null=False,
+                                  blank=True)
 
     def __str__(self):
-        if self.parent is None:
+        if self.parent_id is None:
             return 'Files'
         else:
             return self.path
@@ -64,6 +167,27 @@ class FileDescriptor(models.Model):
         unique_together = ('package', 'parent', 'name')
         ordering = ['path']
 
+class CompileArgument(models.Model):
+    # Command line arguments are interned per package; compile commands only
+    # store the ids of their arguments.
+    package = models.ForeignKey(Package,
+                                on_delete=models.CASCADE,
+                                null=False,
+                                blank=False,
+                                related_name='compile_arguments')
+    value = models.CharField(max_length=256,
+                             null=False,
+                             blank=True)
+
+    def __str__(self):
+        return self.value
+
+    class Meta:
+        db_table = 'cpp_doc_compile_argument'
+        verbose_name = 'Compile Argument'
+        verbose_name_plural = 'Compile Arguments'
+        unique_together = ('package', 'value')
+
 class CompileCommand(models.Model):
     package = models.ForeignKey(Package,
                                 on_delete=models.CASCADE,
@@ -72,28 +196,45 @@ class CompileCommand(models.Model):
                                 related_name='compile_commands')
     directory = models.ForeignKey(FileDescriptor,
                                   on_delete=models.CASCADE,
+                                  db_constraint=False,
                                   null=False,
                                   blank=False,
                                   related_name='compile_command_directories')
     file = models.ForeignKey(FileDescriptor,
                              on_delete=models.CASCADE,
+                             db_constraint=False,
                              null=False,
                              blank=False,
                              related_name='compile_command_files')
     output = models.ForeignKey(FileDescriptor,
                                on_delete=models.CASCADE,
+                               db_constraint=False,
                                null=True,
                                blank=True,
                                related_name='compile_command_outputs')
-    command_line = ArrayField(
-        models.CharField(max_length=256),
+    # CompileArgument ids in command line order.
+    arguments = ArrayField(
+        models.IntegerField(),
         size=256,
         null=False,
         blank=True,
     )
 
+    @staticmethod
+    def get_command_lines(commands):
+        """Rebuilds the command lines of several commands with one query."""
+        ids = {pk for command in commands for pk in command.arguments}
+        values = dict(CompileArgument.objects.filter(pk__in=ids).values_list(
+            'pk', 'value'))
+        return [[values[pk] for pk in command.arguments]
+                for command in commands]
+
+    def get_command_line(self):
+        return self.get_command_lines([self])[0]
+
     def __str__(self):
-        return '{}: {}'.format(str(self.package), ' '.join(self.command_line))
+        return '{}: {}'.format(str(self.package),
+                               ' '.join(self.get_command_line()))
 
     class Meta:
         db_table = 'cpp_doc_compile_command'
@@ -109,11 +250,13 @@ class Linkage(models.Model):
                                 related_name='linkages')
     file = models.ForeignKey(FileDescriptor,
                              on_delete=models.CASCADE,
+                             db_constraint=False,
                              null=False,
                              blank=False,
                              related_name='linkage_files')
     output = models.ForeignKey(FileDescriptor,
                                on_delete=models.CASCADE,
+                               db_constraint=False,
                                null=False,
                                blank=False,
                                related_name='linkage_outputs')
@@ -127,9 +270,54 @@ class Linkage(models.Model):
         verbose_name_plural = 'Linkages'
         unique_together = ('package', 'file', 'output')
 
+class FileOutput(models.Model):
+    # Transitive closure of compile commands and linkages: file ends up in
+    # output, either directly or through intermediate outputs. Rebuilt by
+    # linkage.update_file_outputs().
+    package = models.ForeignKey(Package,
+                                on_delete=models.CASCADE,
+                                null=False,
+                                blank=False,
+                                related_name='file_outputs')
+    file = models.ForeignKey(FileDescriptor,
+                             on_delete=models.CASCADE,
+                             db_constraint=False,
+                             null=False,
+                             blank=False,
+                             related_name='reachable_outputs')
+    output = models.ForeignKey(FileDescriptor,
+                               on_delete=models.CASCADE,
+                               db_constraint=False,
+                               null=False,
+                               blank=False,
+                               related_name='reachable_files')
+    is_direct = models.BooleanField()
+    # Whether file is compiled by a compile command.
+    is_source = models.BooleanField()
+
+    def __str__(self):
+        return '{} -> {}'.format(str(self.file), str(self.output))
+
+    class Meta:
+        db_table = 'cpp_doc_file_output'
+        verbose_name = 'File Output'
+        verbose_name_plural = 'File Outputs'
+        unique_together = ('file', 'output')
+        indexes = [
+            models.Index(fields=['output', 'file'],
+                         name='cpp_doc_file_output_output'),
+        ]
+
 class PresumedLoc(models.Model):
+    package = models.ForeignKey(Package,
+                                on_delete=models.CASCADE,
+                                db_constraint=False,
+                                null=False,
+                                blank=False,
+                                related_name='presumed_locs')
     file = models.ForeignKey(FileDescriptor,
                              on_delete=models.CASCADE,
+                             db_constraint=False,
                              null=False,
                              blank=False,
                              related_name='presumed_locs')
@@ -140,62 +328,29 @@ class PresumedLoc(models.Model):
         return "{}:{}:{}".format(str(self.file), self.line, self.col)
 
     def get_github_url(self):
-        import os.path
-
-        package = self.file.package
-        version = package.version
-        slug = package.package_name.slug
-
-        if slug == 'ninja':
-            return "https://github.com/ninja-build/ninja/tree/v1.7.2/{}#L{}".format(version, self.file.path, self.line)
-        elif slug == 'mosh':
-            return "https://github.com/mobile-shell/mosh/tree/mosh-{}/{}#L{}".format(version, self.file.path, self.line)
-        elif slug == 'fish':
-            path = os.path.relpath(self.file.path, 'fish-shell-{}'.format(version))
-            return "https://github.com/fish-shell/fish-shell/tree/{}/{}#L{}".format(version, path, self.line)
-        elif slug == 'opencv':
-            return "https://github.com/opencv/opencv/tree/{}/{}#L{}".format(version, self.file.path, self.line)
-        elif slug == 'protobuf':
-            return "https://github.com/google/protobuf/tree/v{}/{}#L{}".format(version, self.file.path, self.line)
-        elif slug == 'bitcoin':
-            return "https://github.com/bitcoin/bitcoin/tree/v{}/{}#L{}".format(version, self.file.path, self.line)
-        elif slug == 'libsequence':
-            path = os.path.relpath(self.file.path, '{}-{}'.format(slug, version))
-            return 'https://github.com/molpopgen/libsequence/tree/{}/{}#L{}'.format(version, path, self.line)
-        elif slug == 'llvm':
-            if version == '4.0.0':
-                version_tag = 'release_40'
-            elif version == '5.0.0':
-                version_tag = 'release_50'
-            else:
-                return None
-
-            if self.file.path.startswith('tools/clang/tools/extra'):
-              return "https://github.com/llvm-mirror/clang-tools-extra/tree/{}/{}#L{}".format(version_tag, self.file.path[24:], self.line)
-            elif self.file.path.startswith('tools/clang'):
-              return "https://github.com/llvm-mirror/clang/tree/{}/{}#L{}".format(version_tag, self.file.path[12:], self.line)
-            elif self.file.path.startswith('tools/lldb'):
-              return "https://github.com/llvm-mirror/lldb/tree/{}/{}#L{}".format(version_tag, self.file.path[11:], self.line)
-            elif self.file.path.startswith('tools/lld'):
-              return "https://github.com/llvm-mirror/lld/tree/{}/{}#L{}".format(version_tag, self.file.path[10:], self.line)
-            elif self.file.path.startswith('projects/compiler-rt'):
-              return "https://github.com/llvm-mirror/compiler-rt/tree/{}/{}#L{}".format(version_tag, self.file.path[21:], self.line)
-            elif self.file.path.startswith('build'):
-              return None
-            else:
-              return "https://github.com/llvm-mirror/llvm/tree/{}/{}#L{}".format(version_tag, self.file.path, self.line)
-        else:
+        if not self.file.source_url:
             return None
+        return '{}#L{}'.format(self.file.source_url, self.line)
 
     class Meta:
         db_table = 'cpp_doc_presumed_loc'
         verbose_name = 'Presumed Loc'
         verbose_name_plural = 'Presumed Locs'
-        unique_together = ('file', 'line', 'col')
-
-class Decl(models.Model):
+        unique_together = ('package', 'file', 'line', 'col')
+
+class Decl(TreeNodeBase):
+    OTHER, NAMESPACE, RECORD, METHOD, FIELD, FUNCTION = range(6)
+    KIND_CHOICES = (
+        (OTHER, "Other"),
+        (NAMESPACE, "Namespace"),
+        (RECORD, "Record"),
+        (METHOD, "Method"),
+        (FIELD, "Field"),
+        (FUNCTION, "Function"),
+    )
     package = models.ForeignKey(Package,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 related_name='decl_contexts')
@@ -207,35 +362,41 @@ class Decl(models.Model):
                             blank=True)
     parent = models.ForeignKey('Decl',
                                on_delete=models.CASCADE,
+                               db_constraint=False,
                                null=True,
                                blank=True,
                                related_name='children')
     presumed_loc = models.ForeignKey(PresumedLoc,
                                      on_delete=models.CASCADE,
+                                     db_constraint=False,
                                      null=True,
                                      blank=True,
                                      related_name='decls')
+    # Which subtype row the decl has, set by the importer so listings by
+    # kind need no join against the subtype tables.
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES,
+                                            default=OTHER)
 
     def namespaces(self):
-        return self.children.filter(namespace__isnull=False)
+        return self.get_children().filter(kind=Decl.NAMESPACE)
 
     def methods(self):
-        return self.children.filter(method__isnull=False)
+        return self.get_children().filter(kind=Decl.METHOD)
 
     def fields(self):
-        return self.children.filter(field__isnull=False)
+        return self.get_children().filter(kind=Decl.FIELD)
 
     def records(self):
-        return self.children.filter(record__isnull=False)
+        return self.get_children().filter(kind=Decl.RECORD)
 
     def __str__(self):
-        if self.parent is None:
+        if self.parent_id is None:
             return 'Declarations'
         else:
             return self.path
 
     def get_name(self):
-        if self.parent is None:
+        if self.parent_id is None:
             return 'Declarations'
         elif self.name == '':
             return '(anonymous)'
@@ -249,9 +410,19 @@ class Decl(models.Model):
         verbose_name_plural = 'Decls'
         unique_together = ('package', 'path')
 
+# Decl kinds by the related name of their subtype.
+DECL_KINDS = {
+    'namespace': Decl.NAMESPACE,
+    'record': Decl.RECORD,
+    'method': Decl.METHOD,
+    'field': Decl.FIELD,
+    'function': Decl.FUNCTION,
+}
+
 class NamespaceDecl(models.Model):
     decl = models.OneToOneField(Decl,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 primary_key=True,
@@ -268,6 +439,7 @@ class NamespaceDecl(models.Model):
 class RecordDecl(models.Model):
     decl = models.OneToOneField(Decl,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 primary_key=True,
@@ -279,10 +451,12 @@ class RecordDecl(models.Model):
         return str(self.decl)
 
     def public_view_methods(self):
-        return PublicView.objects.filter(record=self, decl__method__isnull=False)
+        return PublicView.objects.filter(package=self.decl.package_id,
+                                         record=self, kind=Decl.METHOD)
 
     def public_view_fields(self):
-        return PublicView.objects.filter(record=self, decl__field__isnull=False)
+        return PublicView.objects.filter(package=self.decl.package_id,
+                                         record=self, kind=Decl.FIELD)
 
     class Meta:
         db_table = 'cpp_doc_record_decl'
@@ -292,6 +466,7 @@ class RecordDecl(models.Model):
 class MethodDecl(models.Model):
     decl = models.OneToOneField(Decl,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 primary_key=True,
@@ -323,6 +498,7 @@ class MethodDecl(models.Model):
 class FieldDecl(models.Model):
     decl = models.OneToOneField(Decl,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 primary_key=True,
@@ -349,6 +525,7 @@ class FieldDecl(models.Model):
 class FunctionDecl(models.Model):
     decl = models.OneToOneField(Decl,
                                 on_delete=models.CASCADE,
+                                db_constraint=False,
                                 null=False,
                                 blank=False,
                                 primary_key=True,
@@ -521,18 +698,154 @@ class RecordCounts(RecordCountsBase):
         verbose_name = 'Record Counts'
         verbose_name_plural = 'Record Counts'
 
+class DeclCounts(RecordCountsBase):
+    # Record counts summed over every record in the subtree of a decl,
+    # including the decl itself if it is a record.
+    decl = models.OneToOneField(Decl,
+                                on_delete=models.CASCADE,
+                                db_constraint=False,
+                                null=False,
+                                blank=False,
+                                primary_key=True,
+                                related_name='subtree_counts')
+    num_records = models.PositiveIntegerField()
+
+    def __str__(self):
+        return str(self.decl)
+
+    class Meta(RecordCountsBase.Meta):
+        db_table = 'cpp_doc_decl_counts'
+        verbose_name = 'Decl Counts'
+        verbose_name_plural = 'Decl Counts'
+
 class PublicView(models.Model):
+    package = models.ForeignKey(Package,
+                                on_delete=models.CASCADE,
+                                db_constraint=False,
+                                null=False,
+                                blank=False,
+                                related_name='public_views')
     record = models.ForeignKey(RecordDecl,
                                on_delete=models.CASCADE,
+                               db_constraint=False,
                                related_name='public_view')
     decl = models.ForeignKey(Decl,
                              on_delete=models.CASCADE,
+                             db_constraint=False,
                              related_name='public_view',
                              blank=True,
                              null=True)
+    # Copied from the member and its subtype and immutability check rows by
+    # update_public_views(), so a record's members are listed from this table
+    # alone.
+    kind = models.PositiveSmallIntegerField(choices=Decl.KIND_CHOICES,
+                                            default=Decl.OTHER)
+    path = models.CharField(max_length=8192,
+                            null=False,
+                            blank=True)
+    access = models.PositiveIntegerField(choices=MethodDecl.ACCESS_CHOICES,
+                                         null=True,
+                                         blank=True)
+    # The member is declared in a base of the record.
+    is_inherited = models.BooleanField(default=False)
+    is_const = models.BooleanField(default=False)
+    is_mutable = models.BooleanField(default=False)
+    mutate_result = models.PositiveIntegerField(
+        choices=ClangImmutabilityCheckMethodBase.MUTATE_RESULT_CHOICES,
+        null=True,
+        blank=True,
+    )
+    return_result = models.PositiveIntegerField(
+        choices=ClangImmutabilityCheckMethodBase.RETURN_RESULT_CHOICES,
+        null=True,
+        blank=True,
+    )
+    is_transitive = models.BooleanField(null=True)
+    is_explicit = models.BooleanField(null=True)
+    location_url = models.CharField(max_length=8192,
+                                    null=False,
+                                    blank=True)
 
     class Meta:
         db_table = 'cpp_doc_public_view'
         verbose_name = 'Public View'
         verbose_name_plural = 'Public Views'
-        unique_together = ('record', 'decl')
+        unique_together = ('package', 'record', 'decl')
+        indexes = [
+            models.Index(fields=['record', 'kind', 'path'],
+                         name='cpp_doc_public_view_members'),
+        ]
+
+class PackageDiff(models.Model):
+    old = models.ForeignKey(Package,
+                            on_delete=models.CASCADE,
+                            null=False,
+                            blank=False,
+                            related_name='diffs_from')
+    new = models.ForeignKey(Package,
+                            on_delete=models.CASCADE,
+                            null=False,
+                            blank=False,
+                            related_name='diffs_to')
+    # Modification times of both packages when the entries were computed.
+    old_modified = models.DateTimeField()
+    new_modified = models.DateTimeField()
+
+    def __str__(self):
+        return '{} to {}'.format(str(self.old), self.new.version)
+
+    def is_current(self):
+        return (self.old_modified == self.old.modified and
+                self.new_modified == self.new.modified)
+
+    class Meta:
+        db_table = 'cpp_doc_package_diff'
+        verbose_name = 'Package Diff'
+        verbose_name_plural = 'Package Diffs'
+        unique_together = ('old', 'new')
+
+class PackageDiffEntry(models.Model):
+    diff = models.ForeignKey(PackageDiff,
+                             on_delete=models.CASCADE,
+                             null=False,
+                             blank=False,
+                             related_name='entries')
+    KIND_CHOICES = (
+        (0, "Method"),
+        (1, "Field"),
+    )
+    kind = models.PositiveIntegerField(
+        choices=KIND_CHOICES,
+    )
+    CHANGE_CHOICES = (
+        (0, "Added"),
+        (1, "Removed"),
+        (2, "Changed"),
+    )
+    change = models.PositiveIntegerField(
+        choices=CHANGE_CHOICES,
+    )
+    path = models.CharField(max_length=8192,
+                            null=False,
+                            blank=True)
+    old_decl = models.ForeignKey(Decl,
+                                 on_delete=models.CASCADE,
+                                 db_constraint=False,
+                                 null=True,
+                                 blank=True,
+                                 related_name='+')
+    new_decl = models.ForeignKey(Decl,
+                                 on_delete=models.CASCADE,
+                                 db_constraint=False,
+                                 null=True,
+                                 blank=True,
+                                 related_name='+')
+
+    def __str__(self):
+        return '{}: {}'.format(self.get_change_display(), self.path)
+
+    class Meta:
+        db_table = 'cpp_doc_package_diff_entry'
+        ordering = ['path']
+        verbose_name = 'Package Diff Entry'
+        verbose_name_plural = 'Package Diff Entries'
@@ -0,0 +1,86 @@
+from django.db import DatabaseError, connection, transaction
+
+# Tables partitioned by package_id, with one partition per package (see
+# migration 0013). Rows of a package can only be inserted once its partitions
+# exist.
+#
+# Creating, detaching and dropping a partition takes an ACCESS EXCLUSIVE lock
+# on the partitioned table. That lock waits for every open transaction that
+# has written to the table, such as a running import, and every query on the
+# table queues behind it in the meantime. Partition DDL must therefore not
+# overlap with imports; import_dumps() runs it before and after its imports,
+# and the lock timeout makes a conflicting call fail instead of stalling the
+# site.
+PARTITIONED_TABLES = [
+    'cpp_doc_file_descriptor',
+    'cpp_doc_presumed_loc',
+    'cpp_doc_decl',
+    'cpp_doc_public_view',
+]
+
+LOCK_TIMEOUT = '5s'
+
+# Package ids of partitions whose package row does not exist, such as those
+# of an import that was killed.
+ORPHAN_PARTITIONS_SQL = '''
+SELECT package_id FROM (
+    SELECT DISTINCT substring(c.relname FROM '_p([0-9]+)$')::integer
+        AS package_id
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = ANY(%s::regclass[])
+) partitions
+WHERE NOT EXISTS (SELECT 1 FROM cpp_doc_package p
+                  WHERE p.id = partitions.package_id)
+ORDER BY package_id
+'''
+
+def partition_name(table, package_id):
+    return '{}_p{}'.format(table, int(package_id))
+
+def set_lock_timeout(cursor):
+    # Local to the transaction, which the callers' atomic blocks end soon
+    # after.
+    cursor.execute("SELECT set_config('lock_timeout', %s, true)",
+                   [LOCK_TIMEOUT])
+
+def create_partitions(package_id):
+    with transaction.atomic(), connection.cursor() as cursor:
+        set_lock_timeout(cursor)
+        for table in PARTITIONED_TABLES:
+            cursor.execute(
+                'CREATE TABLE {} PARTITION OF {} FOR VALUES IN ({})'.format(
+                    partition_name(table, package_id), table, int(package_id)))
+
+def drop_partitions(package_id):
+    # Detaching locks the partitioned table until the transaction commits.
+    with transaction.atomic(), connection.cursor() as cursor:
+        set_lock_timeout(cursor)
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, package_id)
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is None:
+                continue
+            cursor.execute('ALTER TABLE {} DETACH PARTITION {}'.format(
+                table, name))
+            cursor.execute('DROP TABLE {}'.format(name))
+
+def drop_partitions_of(package_ids):
+    """Drops the partitions of several packages.
+
+    A package whose partitions cannot be dropped, for example because the
+    lock timed out, does not stop the others. Returns (package_id, error)
+    for each failure.
+    """
+    failures = []
+    for package_id in package_ids:
+        try:
+            drop_partitions(package_id)
+        except DatabaseError as e:
+            failures.append((package_id, e))
+    return failures
+
+def orphan_partition_ids():
+    with connection.cursor() as cursor:
+        cursor.execute(ORPHAN_PARTITIONS_SQL, [PARTITIONED_TABLES])
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,86 @@
+from django.db import connection, transaction
+
+from .models import Decl
+
+PUBLIC = 0
+
+# What a record page shows about each member, copied onto its public view
+# rows from the member and its subtype, check, location and file rows.
+MEMBER_COLUMNS = [
+    ('kind', 'd.kind'),
+    ('path', 'd.path'),
+    ('access', 'COALESCE(m.access, f.access)'),
+    ('is_const', 'COALESCE(m.is_const, FALSE)'),
+    ('is_mutable', 'COALESCE(f.is_mutable, FALSE)'),
+    ('mutate_result', 'mc.mutate_result'),
+    ('return_result', 'mc.return_result'),
+    ('is_transitive', 'fc.is_transitive'),
+    ('is_explicit', 'fc.is_explicit'),
+    ('location_url', "CASE WHEN fd.source_url <> '' "
+                     "THEN fd.source_url || '#L' || l.line ELSE '' END"),
+]
+
+MEMBER_JOINS = '''LEFT JOIN cpp_doc_method_decl m ON m.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_method mc ON mc.method_id = d.id
+LEFT JOIN cpp_doc_field_decl f ON f.decl_id = d.id
+LEFT JOIN cpp_doc_clang_immutability_check_field fc ON fc.field_id = d.id
+LEFT JOIN cpp_doc_presumed_loc l
+    ON l.id = d.presumed_loc_id AND l.package_id = d.package_id
+LEFT JOIN cpp_doc_file_descriptor fd
+    ON fd.id = l.file_id AND fd.package_id = d.package_id'''
+
+# A record's own public members are worked out from their access. The schema
+# does not record base classes, so inherited members are only known from the
+# dump's public view rows, which are kept for them alone.
+DELETE_OWN_MEMBERS_SQL = '''
+DELETE FROM cpp_doc_public_view v
+USING cpp_doc_decl d
+WHERE d.id = v.decl_id
+  AND d.parent_id = v.record_id
+  AND d.package_id = %(package)s
+  AND v.package_id = %(package)s
+'''
+
+INSERT_OWN_MEMBERS_SQL = '''
+INSERT INTO cpp_doc_public_view
+    (package_id, record_id, decl_id, is_inherited, {columns})
+SELECT %(package)s, d.parent_id, d.id, FALSE, {expressions}
+FROM cpp_doc_decl d
+JOIN cpp_doc_record_decl r ON r.decl_id = d.parent_id
+{joins}
+WHERE d.package_id = %(package)s
+  AND d.kind IN ({method}, {field})
+  AND COALESCE(m.access, f.access) = {public}
+'''.format(
+    columns=', '.join(column for column, expression in MEMBER_COLUMNS),
+    expressions=', '.join(expression for column, expression in MEMBER_COLUMNS),
+    joins=MEMBER_JOINS, method=Decl.METHOD, field=Decl.FIELD,
+    public=PUBLIC)
+
+UPDATE_INHERITED_MEMBERS_SQL = '''
+UPDATE cpp_doc_public_view v
+SET is_inherited = TRUE, {assignments}
+FROM cpp_doc_decl d
+{joins}
+WHERE d.id = v.decl_id
+  AND d.parent_id IS DISTINCT FROM v.record_id
+  AND d.package_id = %(package)s
+  AND v.package_id = %(package)s
+'''.format(
+    assignments=', '.join('{} = {}'.format(column, expression)
+                          for column, expression in MEMBER_COLUMNS),
+    joins=MEMBER_JOINS)
+
+def update_public_views(package):
+    """Rebuilds the public view rows of the package's own record members and
+    refreshes those of inherited members. Returns the number of rows.
+    """
+    params = {'package': package.pk}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(DELETE_OWN_MEMBERS_SQL, params)
+        cursor.execute(INSERT_OWN_MEMBERS_SQL, params)
+        count = cursor.rowcount
+        cursor.execute(UPDATE_INHERITED_MEMBERS_SQL, params)
+        count += cursor.rowcount
+        package.touch(files=False)
+    return count
@@ -0,0 +1,41 @@
+from django.db import connection
+from django.utils import timezone
+
+from .models import Package
+
+RESOLVE_SOURCE_URLS_SQL = '''
+UPDATE cpp_doc_file_descriptor fd
+SET source_url = COALESCE((
+    SELECT replace(replace(rule.url_template, '{version}', p.version),
+                   '{path}', substr(fd.path, length(rule.prefix) + 1))
+    FROM (
+        SELECT r.version, r.url_template,
+               replace(r.prefix, '{version}', p.version) AS prefix
+        FROM cpp_doc_source_url_rule r
+        WHERE r.slug = n.slug AND r.version IN ('', p.version)
+    ) rule
+    WHERE left(fd.path, length(rule.prefix)) = rule.prefix
+    ORDER BY length(rule.prefix) DESC, rule.version DESC
+    LIMIT 1
+), '')
+FROM cpp_doc_package p
+JOIN cpp_doc_package_name n ON n.id = p.package_name_id
+WHERE fd.package_id = p.id
+'''
+
+def resolve_source_urls(package=None):
+    sql = RESOLVE_SOURCE_URLS_SQL
+    params = []
+    if package is not None:
+        sql += 'AND p.id = %s'
+        params.append(package.pk)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        count = cursor.rowcount
+    if package is None:
+        now = timezone.now()
+        Package.objects.update(modified=now, files_modified=now,
+                               decls_modified=now)
+    else:
+        package.touch()
+    return count
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shlex
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .models import (
+    Decl,
+    DeclCounts,
+    FileDescriptor,
+    FileOutput,
+    PublicView,
+)
+from .views import file_get_compile_commands
+
+BATCH_SIZE = 500
+MANIFEST_NAME = '.cpp_doc_static.json'
+
+def page_path(output, url):
+    return os.path.join(output, url.lstrip('/'), 'index.html')
+
+def write_page(output, url, content, hashes, old_hashes):
+    # Unchanged pages are not rewritten, so mirrors only sync what changed.
+    content = content.encode('utf-8')
+    digest = hashlib.md5(content).hexdigest()
+    hashes[url] = digest
+    path = page_path(output, url)
+    if old_hashes.get(url) == digest and os.path.exists(path):
+        return 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return 1
+
+def group_by(objects, key):
+    groups = defaultdict(list)
+    for obj in objects:
+        groups[key(obj)].append(obj)
+    return groups
+
+def load_ancestors(model, package, nodes):
+    ids = set()
+    for node in nodes:
+        ids.update(node.get_ancestor_ids())
+    return {node.pk: node
+            for node in model.objects.filter(package=package, pk__in=ids)}
+
+def ancestor_context(node, ancestors):
+    chain = [ancestors[pk] for pk in node.get_ancestor_ids()]
+    return (chain[0] if chain else node), chain[1:]
+
+def file_pages(package, pks):
+    """Yields (url, template, context) for a batch of file descriptors.
+
+    The batch is loaded with one query each for the files, their children,
+    their ancestors, their outputs, their sources and their compile commands
+    (plus one for the command lines).
+    """
+    slug, version = package.package_name.slug, package.version
+    fds = list(FileDescriptor.objects.filter(package=package, pk__in=pks))
+    children = group_by(
+        FileDescriptor.objects.filter(package=package, parent__in=pks),
+        lambda child: child.parent_id)
+    ancestors = load_ancestors(FileDescriptor, package, fds)
+    outputs = group_by(
+        FileOutput.objects.filter(file__in=pks).select_related(
+            'output').order_by('output__path'),
+        lambda row: row.file_id)
+    sources = group_by(
+        FileOutput.objects.filter(output__in=pks, is_source=True)
+            .select_related('file').order_by('file__path'),
+        lambda row: row.output_id)
+    compile_commands = file_get_compile_commands(fds)
+    for fd in fds:
+        root_fd, directory_list = ancestor_context(fd, ancestors)
+        context = {
+            'package_name': package.package_name,
+            'package': package,
+            'fd': fd,
+            'root_fd': root_fd,
+            'directory_list': directory_list,
+            'children': children[fd.pk],
+            'children_next': None,
+            # Static pages have no subtree endpoint to expand the tree from.
+            'subtree_url': None,
+            'outputs': [row.output for row in outputs[fd.pk]],
+            'sources': [row.file for row in sources[fd.pk]],
+            'compile_commands': [
+                (command, ' '.join(shlex.quote(arg) for arg in command_line))
+                for command, command_line in compile_commands[fd.pk]],
+        }
+        urls = [reverse('cpp_doc:file_detail', args=[slug, version, fd.pk])]
+        if fd.parent_id is None:
+            urls.append(reverse('cpp_doc:file_root', args=[slug, version]))
+        for url in urls:
+            yield url, 'cpp_doc/file_detail.html', context
+
+def decl_pages(package, pks):
+    """Yields (url, template, context) for a batch of declarations.
+
+    The batch is loaded with one query each for the declarations, their
+    namespaces, their records, their ancestors and the public members of the
+    records among them.
+    """
+    slug, version = package.package_name.slug, package.version
+    decls = list(Decl.objects.filter(
+        package=package, pk__in=pks).select_related('record',
+                                                     'subtree_counts'))
+    namespaces = group_by(
+        Decl.objects.filter(package=package, parent__in=pks,
+                            kind=Decl.NAMESPACE)
+            .select_related('subtree_counts').order_by('path'),
+        lambda child: child.parent_id)
+    records = group_by(
+        Decl.objects.filter(package=package, parent__in=pks,
+                            kind=Decl.RECORD)
+            .select_related('record__counts').order_by('path'),
+        lambda child: child.parent_id)
+    ancestors = load_ancestors(Decl, package, decls)
+
+    record_ids = [decl.pk for decl in decls if decl.kind == Decl.RECORD]
+    members = group_by(
+        PublicView.objects.filter(
+            package=package, record__in=record_ids,
+            kind__in=[Decl.METHOD, Decl.FIELD]).order_by('path'),
+        lambda view: (view.record_id, view.kind))
+
+    for decl in decls:
+        root_decl, decl_context_list = ancestor_context(decl, ancestors)
+        context = {
+            'package_name': package.package_name,
+            'package': package,
+            'decl': decl,
+            'root_decl': root_decl,
+            'decl_context_list': decl_context_list,
+            'namespaces': namespaces[decl.pk],
+            'namespaces_next': None,
+            'records': records[decl.pk],
+            'records_next': None,
+            'subtree_url': None,
+            'methods': members[decl.pk, Decl.METHOD],
+            'fields': members[decl.pk, Decl.FIELD],
+        }
+        urls = [reverse('cpp_doc:decl_detail', args=[slug, version, decl.pk])]
+        if decl.parent_id is None:
+            urls.append(reverse('cpp_doc:decl_root', args=[slug, version]))
+        for url in urls:
+            yield url, 'cpp_doc/decl_detail.html', context
+
+PAGE_LOADERS = {
+    'file': file_pages,
+    'decl': decl_pages,
+}
+
+_worker_state = {}
+
+def init_worker(package, output, old_hashes):
+    # Each worker opens its own database connection on first use.
+    _worker_state['package'] = package
+    _worker_state['output'] = output
+    _worker_state['old_hashes'] = old_hashes
+
+def render_batch(args):
+    kind, pks = args
+    hashes = {}
+    written = 0
+    for url, template, context in PAGE_LOADERS[kind](_worker_state['package'],
+                                                     pks):
+        written += write_page(_worker_state['output'], url,
+                              render_to_string(template, context), hashes,
+                              _worker_state['old_hashes'])
+    return kind, hashes, written
+
+def page_batches(package, kinds):
+    # Ordering by materialized path keeps every subtree contiguous, so each
+    # batch covers neighbouring subtrees and shares most of its ancestors.
+    pages = {
+        'file': FileDescriptor.objects.filter(package=package),
+        # Only the root, namespaces and records are linked to from other
+        # pages.
+        'decl': Decl.objects.filter(package=package).filter(
+            Q(parent=None) | Q(kind__in=[Decl.NAMESPACE, Decl.RECORD])),
+    }
+    for kind in kinds:
+        pks = pages[kind].order_by('tree_path').values_list('pk', flat=True)
+        batch = []
+        for pk in pks.iterator():
+            batch.append(pk)
+            if len(batch) == BATCH_SIZE:
+                yield kind, batch
+                batch = []
+        if batch:
+            yield kind, batch
+
+def read_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if 'stamps' not in manifest:
+        # Missing or written by an older version: rebuild everything.
+        manifest = {'modified': None, 'stamps': {}, 'pages': {}}
+    return manifest
+
+def page_stamps(package):
+    # The data each kind of page shows changes with its own stamp.
+    return {
+        'file': package.files_modified.isoformat(),
+        'decl': package.decls_modified.isoformat(),
+    }
+
+def build_static(package, output, workers=1, force=False):
+    """Renders the file and declaration pages of a package version to disk.
+
+    Pages are written to their URL paths below output, so the site must be
+    served with django_cpp_doc.urls at the same prefix. A manifest records
+    the package's modification stamps and a hash of every page: an unchanged
+    package is skipped, pages whose data has not changed since the last
+    build are neither loaded nor rendered, and of the rest only pages whose
+    content changed are rewritten. Pages that no longer exist are removed.
+
+    Returns (written, removed), or None if the package was up to date.
+    """
+    slug, version = package.package_name.slug, package.version
+    package_url = reverse('cpp_doc:package_detail', args=[slug, version])
+    manifest_path = os.path.join(output, package_url.lstrip('/'),
+                                 MANIFEST_NAME)
+    manifest = read_manifest(manifest_path)
+    modified = package.modified.isoformat()
+    if not force and manifest['modified'] == modified:
+        return None
+    stamps = page_stamps(package)
+    old_pages = manifest['pages']
+    kinds = [kind for kind in PAGE_LOADERS
+             if force or manifest['stamps'].get(kind) != stamps[kind]]
+    # Pages of the kinds that are not rebuilt are kept as they are.
+    pages = {kind: old_pages.get(kind, {}) for kind in PAGE_LOADERS
+             if kind not in kinds}
+    old_hashes = {}
+    for kind in kinds:
+        old_hashes.update(old_pages.get(kind, {}))
+
+    pages['package'] = {}
+    context = {
+        'package_name': package.package_name,
+        'package': package,
+        'counts': DeclCounts.objects.filter(
+            decl__package=package, decl__parent=None).first(),
+    }
+    written = write_page(output, package_url,
+                         render_to_string('cpp_doc/package_detail.html',
+                                          context),
+                         pages['package'], old_pages.get('package', {}))
+
+    batches = list(page_batches(package, kinds))
+    if workers > 1 and batches:
+        # Forked workers must not share the parent's connection.
+        connections.close_all()
+        with multiprocessing.Pool(workers, init_worker,
+                                  (package, output, old_hashes)) as pool:
+            results = list(pool.imap_unordered(render_batch, batches))
+    else:
+        init_worker(package, output, old_hashes)
+        results = [render_batch(batch) for batch in batches]
+    for kind in kinds:
+        pages[kind] = {}
+    for kind, batch_hashes, batch_written in results:
+        pages[kind].update(batch_hashes)
+        written += batch_written
+
+    removed = 0
+    hashes = {}
+    for kind in kinds:
+        hashes.update(pages[kind])
+    for url in old_hashes.keys() - hashes.keys():
+        try:
+            os.remove(page_path(output, url))
+            removed += 1
+        except FileNotFoundError:
+            pass
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump({'modified': modified, 'stamps': stamps, 'pages': pages}, f)
+    return written, removed
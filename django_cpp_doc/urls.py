@@ -1,13 +1,23 @@
 from django.conf.urls import url
 
-from . import views
+from . import api, metrics, views
 
 app_name = 'cpp_doc'
 urlpatterns = [
     url(r'^$', views.index, name='index'),
+    url(r'^metrics$', metrics.metrics, name='metrics'),
     url(r'^package/$', views.PackageNameIndexView.as_view(), name='package_name_list'),
     url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/$', views.PackageIndexView.as_view(),
         name='package_list'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/diff/$',
+        views.package_diff_select,
+        name='package_diff_select'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/diff/(?P<old_version>[-\w\.]+)/(?P<new_version>[-\w\.]+)/$',
+        views.package_diff,
+        name='package_diff'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/current/(?P<path>.*)$',
+        views.package_current,
+        name='package_current'),
     url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/$',
         views.PackageDetailView.as_view(),
         name='package_detail'),
@@ -18,11 +28,55 @@ urlpatterns = [
     url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[i\w\.]+)/file/(?P<fd_pk>[0-9]+)/$',
         views.file_detail,
         name='file_detail'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/file/(?P<fd_pk>[0-9]+)/children/$',
+        views.file_children,
+        name='file_children'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/file/(?P<fd_pk>[0-9]+)/subtree/$',
+        views.file_subtree,
+        name='file_subtree'),
 
     url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/$',
         views.decl_root,
         name='decl_root'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/search/$',
+        views.decl_search,
+        name='decl_search'),
     url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/(?P<decl_pk>[0-9]+)/$',
         views.decl_detail,
         name='decl_detail'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/(?P<decl_pk>[0-9]+)/children/$',
+        views.decl_children,
+        name='decl_children'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/(?P<decl_pk>[0-9]+)/subtree/$',
+        views.decl_subtree,
+        name='decl_subtree'),
+    url(r'^package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/export/methods\.(?P<format>csv|jsonl)$',
+        views.method_export,
+        name='method_export'),
+
+    url(r'^api/v1/package/$', api.package_name_list,
+        name='api_package_name_list'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/$', api.package_list,
+        name='api_package_list'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/$',
+        api.package_detail,
+        name='api_package_detail'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/file/$',
+        api.file_list,
+        name='api_file_list'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/file/(?P<fd_pk>[0-9]+)/$',
+        api.file_detail,
+        name='api_file_detail'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/file/(?P<fd_pk>[0-9]+)/outputs/$',
+        api.file_outputs,
+        name='api_file_outputs'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/file/(?P<fd_pk>[0-9]+)/sources/$',
+        api.file_sources,
+        name='api_file_sources'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/$',
+        api.decl_list,
+        name='api_decl_list'),
+    url(r'^api/v1/package/(?P<slug>[A-Za-z][-.\w]*)/(?P<version>[-\w\.]+)/decl/(?P<decl_pk>[0-9]+)/$',
+        api.decl_detail,
+        name='api_decl_detail'),
 ]
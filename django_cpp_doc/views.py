@@ -1,9 +1,29 @@
-from django.http import Http404
-from django.shortcuts import get_object_or_404, render
+import shlex
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import NoReverseMatch, reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
 
-from django.db.models import Q
-from .models import Decl, FileDescriptor, Package, PackageName
+from django.db.models import Count, Exists, OuterRef, Q
+from .cache import package_cache
+from .diff import get_package_diff
+from .export import iter_csv, iter_jsonl, method_rows
+from .models import (
+    DECL_KINDS,
+    CompileCommand,
+    Decl,
+    DeclCounts,
+    FileDescriptor,
+    MethodDecl,
+    Package,
+    PackageDiffEntry,
+    PackageName,
+    RecordDecl,
+)
 
 def index(request):
     return render(request, 'cpp_doc/index.html')
@@ -28,6 +48,18 @@ class PackageIndexView(generic.ListView):
         context['package_name'] = self.package_name
         return context
 
+def package_current(request, slug, path):
+    package_name = get_object_or_404(
+        PackageName.objects.select_related('current'), slug=slug)
+    if package_name.current is None:
+        raise Http404("No current version.")
+    url = reverse('cpp_doc:package_detail',
+                  args=[slug, package_name.current.version]) + path
+    if request.META.get('QUERY_STRING'):
+        url += '?' + request.META['QUERY_STRING']
+    return redirect(url)
+
+@method_decorator(package_cache, name='dispatch')
 class PackageDetailView(generic.DetailView):
     model = Package
     template_name = 'cpp_doc/package_detail.html'
@@ -43,32 +75,115 @@ class PackageDetailView(generic.DetailView):
     def get_context_data(self, **kwargs):
         context = super(PackageDetailView, self).get_context_data(**kwargs)
         context['package_name'] = self.package_name
+        context['counts'] = DeclCounts.objects.filter(
+            decl__package=self.package, decl__parent=None).first()
         return context
 
-def file_get_context(package, fd=None):
-    context = {'package_name': package.package_name, 'package': package}
+CHILDREN_PAGE_SIZE = 100
+
+def keyset_page(queryset, after=None, size=CHILDREN_PAGE_SIZE):
+    # Children are listed by path, so the last path shown is the cursor for
+    # the next page.
+    if after is not None:
+        queryset = queryset.filter(path__gt=after)
+    children = list(queryset.order_by('path')[:size + 1])
+    if len(children) > size:
+        return children[:size], children[size - 1].path
+    return children, None
+
+SUBTREE_DEPTH = 2
+SUBTREE_MAX_DEPTH = 4
+SUBTREE_LIMIT = 1000
+
+def get_subtree_depth(request):
     try:
-        root_fd = FileDescriptor.objects.get(package=package, parent=None)
-        context['root_fd'] = root_fd
-    except (FileDescriptor.DoesNotExist,
-            FileDescriptor.MultipleObjectsReturned):
-        raise Http404("No root directory.")
+        depth = int(request.GET.get('depth', SUBTREE_DEPTH))
+    except ValueError:
+        depth = SUBTREE_DEPTH
+    return max(1, min(depth, SUBTREE_MAX_DEPTH))
+
+def subtree_page(node, queryset, depth, after=None, limit=SUBTREE_LIMIT):
+    """Returns the nodes of up to depth levels below node in one query,
+    ordered by depth and path, and a cursor for the rest of the first level.
+
+    Only whole levels are returned. If the first level alone has more than
+    limit nodes, only its first page is, and after continues it.
+    """
+    # Served level by level by the (package, depth, tree_path) indexes of
+    # migration 0019.
+    nodes = queryset.filter(tree_path__startswith=node.tree_path,
+                            depth__gt=node.depth)
+    if after is not None:
+        nodes = nodes.filter(depth=node.depth + 1, path__gt=after)
+    else:
+        nodes = nodes.filter(depth__lte=node.depth + depth)
+    return whole_levels(list(nodes.order_by('depth', 'path')[:limit + 1]),
+                        node.depth + 1, limit)
 
+def whole_levels(nodes, first_depth, limit):
+    """Trims up to limit + 1 nodes, ordered by depth and path, to the levels
+    that fit in limit, and returns them with a cursor for the first level
+    when not even it fits.
+    """
+    if len(nodes) <= limit:
+        return nodes, None
+    last_depth = nodes[-1].depth
+    if last_depth > first_depth:
+        return [n for n in nodes if n.depth < last_depth], None
+    return nodes[:limit], nodes[limit - 1].path
+
+def file_get_context(package, fd=None):
+    context = {'package_name': package.package_name, 'package': package}
     if fd is None:
-        fd = root_fd
+        try:
+            fd = FileDescriptor.objects.get(package=package, parent=None)
+        except (FileDescriptor.DoesNotExist,
+                FileDescriptor.MultipleObjectsReturned):
+            raise Http404("No root directory.")
     context['fd'] = fd
 
-    directory_list = []
-    directory = fd.parent
-    if directory:
-        while directory.parent is not None:
-            directory_list.append(directory)
-            directory = directory.parent
-    directory_list.reverse()
-    context['directory_list'] = directory_list
+    ancestors = list(fd.get_ancestors())
+    context['root_fd'] = ancestors[0] if ancestors else fd
+    context['directory_list'] = ancestors[1:]
+    # The root page shows the expandable tree.
+    context['subtree_url'] = None if ancestors else reverse(
+        'cpp_doc:file_subtree',
+        args=[package.package_name.slug, package.version, fd.pk])
 
+    for name, kind in [('children', 'child'), ('outputs', 'output'),
+                       ('sources', 'source')]:
+        context[name], context[name + '_next'] = keyset_page(
+            file_get_children(fd, kind))
+    context['compile_commands'] = [
+        (command, ' '.join(shlex.quote(arg) for arg in command_line))
+        for command, command_line in file_get_compile_commands([fd])[fd.pk]]
     return context
 
+def file_get_children(fd, kind='child'):
+    if kind == 'child':
+        return fd.get_children()
+    elif kind == 'output':
+        # Every object, library and binary the file ends up in.
+        return FileDescriptor.objects.filter(package=fd.package_id,
+                                             reachable_files__file=fd)
+    elif kind == 'source':
+        # Every compiled source that ends up in the file.
+        return FileDescriptor.objects.filter(package=fd.package_id,
+                                             reachable_outputs__output=fd,
+                                             reachable_outputs__is_source=True)
+    raise Http404("Unknown child kind.")
+
+def file_get_compile_commands(fds):
+    """Maps each file's pk to its (command, command line) pairs."""
+    commands = list(CompileCommand.objects.filter(file__in=fds).select_related(
+        'directory', 'output').order_by('pk'))
+    compile_commands = {fd.pk: [] for fd in fds}
+    for command, command_line in zip(
+            commands, CompileCommand.get_command_lines(commands)):
+        compile_commands[command.file_id].append((command, command_line))
+    return compile_commands
+
+@package_cache
 def file_root(request, slug, version):
     package_name = get_object_or_404(PackageName, slug=slug)
     package = get_object_or_404(Package, package_name=package_name,
@@ -76,6 +191,7 @@ def file_root(request, slug, version):
     context = file_get_context(package)
     return render(request, 'cpp_doc/file_detail.html', context)
 
+@package_cache
 def file_detail(request, slug, version, fd_pk):
     package_name = get_object_or_404(PackageName, slug=slug)
     package = get_object_or_404(Package, package_name=package_name,
@@ -86,27 +202,91 @@ def file_detail(request, slug, version, fd_pk):
 
 def decl_get_context(package, decl=None):
     context = {'package_name': package.package_name, 'package': package}
-    try:
-        root_decl = Decl.objects.get(package=package, parent=None)
-        context['root_decl'] = root_decl
-    except (Decl.DoesNotExist,
-            Decl.MultipleObjectsReturned):
-        raise Http404("No root declaration.")
-
     if decl is None:
-        decl = root_decl
+        try:
+            decl = Decl.objects.select_related(
+                'record', 'subtree_counts').get(package=package, parent=None)
+        except (Decl.DoesNotExist,
+                Decl.MultipleObjectsReturned):
+            raise Http404("No root declaration.")
     context['decl'] = decl
 
-    decl_context_list = []
-    decl_context = decl.parent
-    if decl_context:
-        while decl_context.parent is not None:
-            decl_context_list.append(decl_context)
-            decl_context = decl_context.parent
-    decl_context_list.reverse()
-    context['decl_context_list'] = decl_context_list
+    ancestors = list(decl.get_ancestors())
+    context['root_decl'] = ancestors[0] if ancestors else decl
+    context['decl_context_list'] = ancestors[1:]
+    context['subtree_url'] = None if ancestors else reverse(
+        'cpp_doc:decl_subtree',
+        args=[package.package_name.slug, package.version, decl.pk])
+
+    context.update(decl_get_members(decl))
     return context
 
+def decl_get_children(decl, kind):
+    if kind == 'namespace':
+        return decl.namespaces().select_related('subtree_counts')
+    elif kind == 'record':
+        return decl.records().select_related('record__counts')
+    raise Http404("Unknown child kind.")
+
+def decl_get_members(decl):
+    context = {'methods': [], 'fields': []}
+    context['namespaces'], context['namespaces_next'] = keyset_page(
+        decl_get_children(decl, 'namespace'))
+    context['records'], context['records_next'] = keyset_page(
+        decl_get_children(decl, 'record'))
+    try:
+        record = decl.record
+    except RecordDecl.DoesNotExist:
+        return context
+
+    context['methods'] = list(record.public_view_methods().order_by('path'))
+    context['fields'] = list(record.public_view_fields().order_by('path'))
+    return context
+
+@package_cache
+def file_children(request, slug, version, fd_pk):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    package = get_object_or_404(Package, package_name=package_name,
+                                version=version)
+    fd = get_object_or_404(FileDescriptor, pk=fd_pk, package=package)
+    kind = request.GET.get('kind', 'child')
+    children, next_after = keyset_page(file_get_children(fd, kind),
+                                       request.GET.get('after'))
+    return JsonResponse({
+        'children': [{
+            'pk': child.pk,
+            'name': child.name if kind == 'child' else child.path,
+            'path': child.path,
+            'url': reverse('cpp_doc:file_detail',
+                           args=[slug, version, child.pk]),
+        } for child in children],
+        'next': next_after,
+    })
+
+@package_cache
+def file_subtree(request, slug, version, fd_pk):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    package = get_object_or_404(Package, package_name=package_name,
+                                version=version)
+    fd = get_object_or_404(FileDescriptor, pk=fd_pk, package=package)
+    fds = FileDescriptor.objects.filter(package=package).annotate(
+        has_children=Exists(FileDescriptor.objects.filter(
+            package=package, parent=OuterRef('pk'))))
+    nodes, next_after = subtree_page(fd, fds, get_subtree_depth(request),
+                                     request.GET.get('after'))
+    return JsonResponse({
+        'nodes': [{
+            'pk': node.pk,
+            'parent': node.parent_id,
+            'name': node.name,
+            'url': reverse('cpp_doc:file_detail',
+                           args=[slug, version, node.pk]),
+            'has_children': node.has_children,
+        } for node in nodes],
+        'next': next_after,
+    })
+
+@package_cache
 def decl_root(request, slug, version):
     package_name = get_object_or_404(PackageName, slug=slug)
     package = get_object_or_404(Package, package_name=package_name,
@@ -114,10 +294,196 @@ def decl_root(request, slug, version):
     context = decl_get_context(package)
     return render(request, 'cpp_doc/decl_detail.html', context)
 
+@package_cache
 def decl_detail(request, slug, version, decl_pk):
     package_name = get_object_or_404(PackageName, slug=slug)
     package = get_object_or_404(Package, package_name=package_name,
                                 version=version)
-    decl = get_object_or_404(Decl, pk=decl_pk, package=package)
+    decl = get_object_or_404(
+        Decl.objects.select_related('record', 'subtree_counts'),
+        pk=decl_pk, package=package)
     context = decl_get_context(package, decl)
     return render(request, 'cpp_doc/decl_detail.html', context)
+
+def decl_child_counts(child, kind):
+    if kind == 'namespace':
+        counts = getattr(child, 'subtree_counts', None)
+    else:
+        counts = getattr(child.record, 'counts', None)
+    if counts is None:
+        return None
+    return [counts.num_methods, counts.num_const_methods,
+            counts.num_const_no_easy, counts.num_const_no_odd,
+            counts.num_const_maybe]
+
+@package_cache
+def decl_children(request, slug, version, decl_pk):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    package = get_object_or_404(Package, package_name=package_name,
+                                version=version)
+    decl = get_object_or_404(Decl, pk=decl_pk, package=package)
+    kind = request.GET.get('kind')
+    children, next_after = keyset_page(decl_get_children(decl, kind),
+                                       request.GET.get('after'))
+    return JsonResponse({
+        'children': [{
+            'pk': child.pk,
+            'name': child.get_name(),
+            'path': child.path,
+            'url': reverse('cpp_doc:decl_detail',
+                           args=[slug, version, child.pk]),
+            'counts': decl_child_counts(child, kind),
+        } for child in children],
+        'next': next_after,
+    })
+
+# Kinds of decls shown in the declaration tree; members are listed on the
+# pages of their records.
+TREE_DECL_KINDS = {Decl.NAMESPACE: 'namespace', Decl.RECORD: 'record'}
+
+@package_cache
+def decl_subtree(request, slug, version, decl_pk):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    package = get_object_or_404(Package, package_name=package_name,
+                                version=version)
+    decl = get_object_or_404(Decl, pk=decl_pk, package=package)
+    # Records local to a function or method are under a decl that is not in
+    # the tree, so they are left out with it.
+    decls = Decl.objects.filter(
+        Q(parent=decl) | Q(parent__kind__in=list(TREE_DECL_KINDS)),
+        package=package, kind__in=list(TREE_DECL_KINDS)).select_related(
+            'subtree_counts', 'record__counts').annotate(
+                has_children=Exists(Decl.objects.filter(
+                    package=package, parent=OuterRef('pk'),
+                    kind__in=list(TREE_DECL_KINDS))))
+    nodes, next_after = subtree_page(decl, decls, get_subtree_depth(request),
+                                     request.GET.get('after'))
+    return JsonResponse({
+        'nodes': [{
+            'pk': node.pk,
+            'parent': node.parent_id,
+            'name': node.get_name(),
+            'kind': TREE_DECL_KINDS[node.kind],
+            'url': reverse('cpp_doc:decl_detail',
+                           args=[slug, version, node.pk]),
+            'has_children': node.has_children,
+            'counts': decl_child_counts(node, TREE_DECL_KINDS[node.kind]),
+        } for node in nodes],
+        'next': next_after,
+    })
+
+SEARCH_PAGE_SIZE = 50
+
+def decl_search(request, slug, version):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    package = get_object_or_404(Package, package_name=package_name,
+                                version=version)
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind', '')
+
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    decls = []
+    if query:
+        # One branch per trigram index, so each can use its own; ORing them
+        # across the join to method decls would scan every decl.
+        decl_ids = Decl.objects.filter(package=package).order_by().values('pk')
+        ids = decl_ids.filter(name__trigram_similar=query).union(
+            decl_ids.filter(path__contains=query),
+            MethodDecl.objects.filter(
+                decl__package=package,
+                mangled_name__contains=query).order_by().values('decl_id'))
+        decls = Decl.objects.filter(package=package, pk__in=ids)
+        if kind in DECL_KINDS:
+            decls = decls.filter(kind=DECL_KINDS[kind])
+        # One row past the page tells whether there is a next one, without
+        # counting every match.
+        start = (page - 1) * SEARCH_PAGE_SIZE
+        decls = list(decls.annotate(
+            rank=TrigramSimilarity('name', query)).order_by('-rank', 'path')[
+                start:start + SEARCH_PAGE_SIZE + 1])
+
+    context = {
+        'package_name': package_name,
+        'package': package,
+        'query': query,
+        'kind': kind,
+        'kinds': DECL_KINDS,
+        'decls': decls[:SEARCH_PAGE_SIZE],
+        'page': page,
+        'has_next': len(decls) > SEARCH_PAGE_SIZE,
+    }
+    return render(request, 'cpp_doc/decl_search.html', context)
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+def method_export(request, slug, version, format):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    package = get_object_or_404(Package, package_name=package_name,
+                                version=version)
+    rows = method_rows(package)
+    chunks = iter_csv(rows) if format == 'csv' else iter_jsonl(rows)
+    response = StreamingHttpResponse(chunks,
+                                     content_type=EXPORT_CONTENT_TYPES[format])
+    response['Content-Disposition'] = \
+        'attachment; filename="{}-{}-methods.{}"'.format(slug, version, format)
+    return response
+
+DIFF_PAGE_SIZE = 100
+
+def package_diff_select(request, slug):
+    try:
+        return redirect('cpp_doc:package_diff', slug,
+                        request.GET.get('old', ''), request.GET.get('new', ''))
+    except NoReverseMatch:
+        # A missing or malformed version; back to the selection form.
+        return redirect('cpp_doc:package_list', slug)
+
+def package_diff(request, slug, old_version, new_version):
+    package_name = get_object_or_404(PackageName, slug=slug)
+    old = get_object_or_404(Package, package_name=package_name,
+                            version=old_version)
+    new = get_object_or_404(Package, package_name=package_name,
+                            version=new_version)
+    diff = get_package_diff(old, new)
+
+    counts = {(row['kind'], row['change']): row['count']
+              for row in diff.entries.values('kind', 'change').annotate(
+                  count=Count('pk')).order_by()}
+    summary = [(kind_name, [counts.get((kind, change), 0)
+                            for change, change_name
+                            in PackageDiffEntry.CHANGE_CHOICES])
+               for kind, kind_name in PackageDiffEntry.KIND_CHOICES]
+
+    entries = diff.entries.all()
+    kind = request.GET.get('kind', '')
+    change = request.GET.get('change', '')
+    if kind.isdigit():
+        entries = entries.filter(kind=kind)
+    if change.isdigit():
+        entries = entries.filter(change=change)
+    related = ['method__immutability_check', 'method__check_result',
+               'field__immutability_check']
+    entries = entries.select_related(
+        *['old_decl__' + name for name in related],
+        *['new_decl__' + name for name in related])
+
+    context = {
+        'package_name': package_name,
+        'old': old,
+        'new': new,
+        'summary': summary,
+        'changes': PackageDiffEntry.CHANGE_CHOICES,
+        'kinds': PackageDiffEntry.KIND_CHOICES,
+        'kind': kind,
+        'change': change,
+        'page': Paginator(entries, DIFF_PAGE_SIZE).get_page(
+            request.GET.get('page')),
+    }
+    return render(request, 'cpp_doc/package_diff.html', context)
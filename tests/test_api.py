@@ -0,0 +1,65 @@
+import base64
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from django_cpp_doc import api
+from django_cpp_doc.api import (
+    API_MAX_PAGE_SIZE,
+    API_PAGE_SIZE,
+    BadRequest,
+    api_view,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        for path in ['llvm::Foo', 'include/a.h', 'ünïcode', '']:
+            self.assertEqual(decode_cursor(encode_cursor(path)), path)
+
+    def test_root_path_makes_non_empty_cursor(self):
+        self.assertTrue(encode_cursor(''))
+
+    def test_malformed(self):
+        for cursor in ['%%%', 'xx', base64.urlsafe_b64encode(b'\xff').decode(),
+                       encode_cursor('a')[:-2],
+                       base64.urlsafe_b64encode(b'1').decode()]:
+            with self.assertRaises(BadRequest):
+                decode_cursor(cursor)
+
+    def test_malformed_is_400(self):
+        view = api_view(lambda request: paginate(request, None))
+        response = view(RequestFactory().get('/', {'cursor': 'xx'}))
+        self.assertEqual(response.status_code, 400)
+
+class PaginateTests(SimpleTestCase):
+    def paginate(self, **query):
+        with mock.patch.object(api, 'keyset_page',
+                               return_value=([], 'last')) as keyset_page:
+            items, cursor = paginate(RequestFactory().get('/', query), None)
+        self.assertEqual(cursor, encode_cursor('last'))
+        return keyset_page.call_args[0][1:]
+
+    def test_defaults(self):
+        self.assertEqual(self.paginate(), (None, API_PAGE_SIZE))
+
+    def test_limit_clamped(self):
+        self.assertEqual(self.paginate(limit=0), (None, 1))
+        self.assertEqual(self.paginate(limit=5), (None, 5))
+        self.assertEqual(self.paginate(limit=10 ** 6),
+                         (None, API_MAX_PAGE_SIZE))
+
+    def test_invalid_limit(self):
+        with self.assertRaises(BadRequest):
+            self.paginate(limit='x')
+
+    def test_cursor(self):
+        self.assertEqual(self.paginate(cursor=encode_cursor('')),
+                         ('', API_PAGE_SIZE))
+
+    def test_last_page(self):
+        with mock.patch.object(api, 'keyset_page', return_value=([], None)):
+            self.assertEqual(paginate(RequestFactory().get('/'), None),
+                             ([], None))
@@ -0,0 +1,36 @@
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from django_cpp_doc.benchmark import (
+    QUERY_BUDGETS,
+    run_import,
+    run_jobs,
+    run_views,
+    write_dump,
+)
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL.')
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            write_dump(path, slug='budget', version='1', files=30, decls=300,
+                       depth=2, record_size=5, seed=0)
+            cls.package, _ = run_import(path)
+        finally:
+            os.remove(path)
+        run_jobs(cls.package)
+
+    def test_views_within_budget(self):
+        for name, seconds, queries, status in run_views(self.package):
+            with self.subTest(view=name):
+                self.assertLess(status, 400)
+                budget = QUERY_BUDGETS.get(name)
+                if budget is not None:
+                    self.assertLessEqual(queries, budget)
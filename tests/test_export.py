@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from django_cpp_doc import export
+from django_cpp_doc.export import METHOD_COLUMNS, iter_csv, iter_jsonl
+
+NAMES = [name for name, lookup in METHOD_COLUMNS]
+
+def row(i):
+    return (i, 'ns::R::m{}'.format(i), 'm{}'.format(i), '_Z1m{}'.format(i),
+            i % 2 == 0, False, 0, 1, 2, None, 'a, "b".h', i, 1)
+
+class IterCsvTests(SimpleTestCase):
+    def test_header_only(self):
+        self.assertEqual(list(iter_csv([])), [','.join(NAMES) + '\r\n'])
+
+    def test_rows(self):
+        rows = [row(i) for i in range(3)]
+        parsed = list(csv.reader(io.StringIO(''.join(iter_csv(rows)))))
+        self.assertEqual(parsed[0], NAMES)
+        self.assertEqual(parsed[1:], [['' if value is None else str(value)
+                                       for value in r] for r in rows])
+
+    @mock.patch.object(export, 'CHUNK_SIZE', 2)
+    def test_chunks(self):
+        chunks = list(iter_csv([row(i) for i in range(5)]))
+        # The header and two rows, two rows, the last row.
+        self.assertEqual([chunk.count('\r\n') for chunk in chunks], [3, 2, 1])
+
+class IterJsonlTests(SimpleTestCase):
+    def test_empty(self):
+        self.assertEqual(list(iter_jsonl([])), [])
+
+    def test_rows(self):
+        rows = [row(i) for i in range(3)]
+        lines = ''.join(iter_jsonl(rows)).splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [dict(zip(NAMES, r)) for r in rows])
+
+    @mock.patch.object(export, 'CHUNK_SIZE', 2)
+    def test_chunks(self):
+        chunks = list(iter_jsonl([row(i) for i in range(5)]))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [2, 2, 1])
+        self.assertTrue(all(chunk.endswith('\n') for chunk in chunks))
@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase
+
+from django_cpp_doc.immutability import (
+    MUTATE_NO,
+    RETURN_FIELD_TRANSITIVE,
+    MethodGraph,
+)
+
+MUTATES = 2
+
+def method(pk, mutate_result=MUTATE_NO, is_const=False, return_result=1):
+    return pk, is_const, mutate_result, return_result
+
+def mutating(graph):
+    graph.propagate()
+    return {pk for i, pk in enumerate(graph.pks) if graph.mutates[i]}
+
+class MethodGraphTests(SimpleTestCase):
+    def test_chain(self):
+        # 1 calls 2 calls 3, which mutates.
+        graph = MethodGraph([method(1), method(2), method(3, MUTATES)],
+                            [(1, 2), (2, 3)])
+        self.assertEqual(mutating(graph), {1, 2, 3})
+
+    def test_chain_stops_at_const(self):
+        graph = MethodGraph([method(1), method(2, is_const=True),
+                             method(3, MUTATES)],
+                            [(1, 2), (2, 3)])
+        self.assertEqual(mutating(graph), {3})
+
+    def test_cycle(self):
+        # 1 and 2 call each other; 2 calls 3, which mutates.
+        graph = MethodGraph([method(1), method(2), method(3, MUTATES),
+                             method(4)],
+                            [(1, 2), (2, 1), (2, 3), (4, 1)])
+        self.assertEqual(mutating(graph), {1, 2, 3, 4})
+
+    def test_cycle_without_mutation(self):
+        graph = MethodGraph([method(1), method(2)], [(1, 2), (2, 1)])
+        self.assertEqual(mutating(graph), set())
+        self.assertTrue(graph.should_be_const(0))
+
+    def test_diamond(self):
+        # 1 calls 2 and 3, which both call 4, which mutates.
+        graph = MethodGraph([method(1), method(2), method(3),
+                             method(4, MUTATES), method(5)],
+                            [(1, 2), (1, 3), (2, 4), (3, 4), (5, 2)])
+        self.assertEqual(mutating(graph), {1, 2, 3, 4, 5})
+        self.assertEqual(list(graph.callers[graph.offsets[3]:
+                                            graph.offsets[4]]), [1, 2])
+
+    def test_call_out_of_package_mutates(self):
+        graph = MethodGraph([method(1), method(2)], [(1, 99)])
+        self.assertEqual(mutating(graph), {1})
+
+    def test_returned_field(self):
+        graph = MethodGraph(
+            [method(1, return_result=RETURN_FIELD_TRANSITIVE)], [])
+        graph.propagate()
+        self.assertFalse(graph.should_be_const(0))
@@ -1,4 +1,26 @@
+import os
+
 SECRET_KEY = 'fake-key'
 INSTALLED_APPS = [
+    "django.contrib.postgres",
+    "django_cpp_doc",
     "tests",
 ]
+ROOT_URLCONF = "tests.urls"
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+    },
+]
+
+# Tests that need the database are skipped unless CPP_DOC_TEST_DATABASE names
+# a PostgreSQL database; the connection is configured through the usual PG*
+# environment variables.
+if os.environ.get("CPP_DOC_TEST_DATABASE"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ["CPP_DOC_TEST_DATABASE"],
+        },
+    }
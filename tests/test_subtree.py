@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from django.test import RequestFactory, SimpleTestCase
+
+from django_cpp_doc.views import get_subtree_depth, whole_levels
+
+def nodes(*levels):
+    """Nodes ordered by depth and path, levels[i] of them at depth i + 1."""
+    return [SimpleNamespace(depth=depth, path='{}/{}'.format(depth, i))
+            for depth, count in enumerate(levels, 1) for i in range(count)]
+
+class WholeLevelsTests(SimpleTestCase):
+    def test_fits(self):
+        subtree = nodes(2, 3)
+        self.assertEqual(whole_levels(subtree, 1, 5), (subtree, None))
+
+    def test_drops_incomplete_level(self):
+        # Fetched with one row past the limit of 4.
+        subtree = nodes(2, 3)
+        self.assertEqual(whole_levels(subtree, 1, 4), (subtree[:2], None))
+
+    def test_drops_level_after_full_levels(self):
+        subtree = nodes(2, 2, 1)
+        self.assertEqual(whole_levels(subtree, 1, 4), (subtree[:4], None))
+
+    def test_pages_first_level(self):
+        subtree = nodes(5)
+        self.assertEqual(whole_levels(subtree, 1, 4),
+                         (subtree[:4], subtree[3].path))
+
+    def test_pages_first_level_below_root(self):
+        subtree = [SimpleNamespace(depth=3, path=str(i)) for i in range(3)]
+        self.assertEqual(whole_levels(subtree, 3, 2), (subtree[:2], '1'))
+
+class SubtreeDepthTests(SimpleTestCase):
+    def depth(self, **query):
+        return get_subtree_depth(RequestFactory().get('/', query))
+
+    def test_default(self):
+        self.assertEqual(self.depth(), 2)
+        self.assertEqual(self.depth(depth='x'), 2)
+
+    def test_clamped(self):
+        self.assertEqual(self.depth(depth=0), 1)
+        self.assertEqual(self.depth(depth=3), 3)
+        self.assertEqual(self.depth(depth=100), 4)
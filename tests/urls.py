@@ -0,0 +1,5 @@
+from django.conf.urls import include, url
+
+urlpatterns = [
+    url(r'^', include('django_cpp_doc.urls')),
+]